@@ -5,6 +5,7 @@ Implements PKCS#1 v2.1 standards for secure RSA
 from __future__ import annotations
 import hashlib
 import secrets
+from functools import lru_cache
 from typing import Tuple
 
 from .utilities import bytes_to_int, int_to_bytes
@@ -22,18 +23,26 @@ def mgf1(seed: bytes, length: int, hash_func=hashlib.sha256) -> bytes:
     Returns:
         Pseudorandom mask of specified length
     """
-    hlen = hash_func().digest_size
+    # Hash seed một lần rồi copy() trạng thái cho từng counter (như MGF1 của OpenSSL),
+    # ghép các block bằng join thay vì += bytes
+    prefix = hash_func(seed)
+    hlen = prefix.digest_size
     if length > (hlen << 32):
         raise ValueError("mask too long")
     
-    t = b""
-    counter = 0
-    while len(t) < length:
-        c = counter.to_bytes(4, "big")
-        t += hash_func(seed + c).digest()
-        counter += 1
+    blocks = []
+    for counter in range(-(-length // hlen)):
+        h = prefix.copy()
+        h.update(counter.to_bytes(4, "big"))
+        blocks.append(h.digest())
     
-    return t[:length]
+    return b"".join(blocks)[:length]
+
+
+@lru_cache(maxsize=16)
+def _label_hash(label: bytes, hash_func) -> bytes:
+    """lHash = Hash(label), cached: label hầu như luôn là b"""""
+    return hash_func(label).digest()
 
 
 def oaep_encode(message: bytes, n_bits: int, label: bytes = b"", 
@@ -63,7 +72,7 @@ def oaep_encode(message: bytes, n_bits: int, label: bytes = b"",
         raise ValueError("message too long for OAEP encoding")
     
     # 1. Generate lHash = Hash(label)
-    lhash = hash_func(label).digest()
+    lhash = _label_hash(label, hash_func)
     
     # 2. Generate PS (padding string of zeros)
     ps_len = k - mlen - 2 * hlen - 2
@@ -134,7 +143,7 @@ def oaep_decode(encoded: bytes, n_bits: int, label: bytes = b"",
     db = bytes(a ^ b for a, b in zip(masked_db, db_mask))
     
     # 6. Parse DB = lHash' || PS || 0x01 || M
-    lhash = hash_func(label).digest()
+    lhash = _label_hash(label, hash_func)
     lhash_prime = db[:hlen]
     
     # Find 0x01 separator
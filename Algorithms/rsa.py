@@ -157,13 +157,18 @@ class RSA:
         return self.decrypt_bytes(ciphertext_blocks, use_crt=use_crt).decode(encoding)
 
     # ---- textbook signature ----
-    def sign(self, message: bytes) -> int:
+    def sign(self, message: bytes, use_crt: bool = False) -> int:
         if self.priv is None:
             raise ValueError("No private key for signing")
         h = bytes_to_int(hashlib.sha256(message).digest()) % self.priv.n
+        if use_crt and self.priv.p and self.priv.q:
+            return self.decrypt_int_crt(h)
         return modexp(h, self.priv.d, self.priv.n)
 
     def verify(self, message: bytes, signature: int) -> bool:
+        # RSAVP1: signature representative out of range -> invalid, skip the modexp
+        if not (0 <= signature < self.pub.n):
+            return False
         h = bytes_to_int(hashlib.sha256(message).digest()) % self.pub.n
         h2 = modexp(signature, self.pub.e, self.pub.n)
         return h == h2
@@ -198,7 +203,7 @@ class RSA:
         return oaep_decode(padded, n_bits, label, hash_func)
 
     # ---- PSS signature (RFC 8017 PKCS#1 v2.1) ----
-    def sign_pss(self, message: bytes, salt_length: int = 32, hash_func=hashlib.sha256) -> int:
+    def sign_pss(self, message: bytes, salt_length: int = 32, hash_func=hashlib.sha256, use_crt: bool = False) -> int:
         """
         Sign using PSS padding (secure, probabilistic).
         Returns signature as integer.
@@ -210,6 +215,9 @@ class RSA:
         n_bits = self.priv.n.bit_length()
         em = pss_encode(message_hash, n_bits, salt_length, hash_func)
         m = bytes_to_int(em)
+        # Use CRT if requested and factors are available
+        if use_crt and self.priv.p and self.priv.q:
+            return self.decrypt_int_crt(m)
         return modexp(m, self.priv.d, self.priv.n)
 
     def verify_pss(self, message: bytes, signature: int, salt_length: int = 32, hash_func=hashlib.sha256) -> bool:
@@ -218,6 +226,8 @@ class RSA:
         Returns True if valid, False otherwise.
         """
         from .padding import pss_verify
+        if not (0 <= signature < self.pub.n):
+            return False
         message_hash = hash_func(message).digest()
         n_bits = self.pub.n.bit_length()
         em_len = (n_bits + 7) // 8
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import math
 import secrets
 from typing import Tuple
 
@@ -34,25 +35,36 @@ def extended_gcd(a: int, b: int) -> Tuple[int, int, int]:
 
 
 def modinv(a: int, n: int) -> int:
-    """Modular inverse using extended gcd."""
-    d, x, _ = extended_gcd(a, n)
-    if d != 1:
-        raise ValueError("No modular inverse exists because gcd(a, n) != 1")
-    return x % n
+    """
+    Modular inverse a^(-1) mod n.
+    Delegates to the built-in pow(a, -1, n), which runs extended Euclid in C.
+    """
+    try:
+        return pow(a, -1, n)
+    except ValueError:
+        raise ValueError("No modular inverse exists because gcd(a, n) != 1") from None
 
 
 def modexp(a: int, b: int, n: int) -> int:
-    """Modular exponentiation by repeated squaring (CLRS 31.6)."""
-    if n == 1:
-        return 0
-    result = 1
-    a %= n
-    while b > 0:
-        if b & 1:
-            result = (result * a) % n
-        a = (a * a) % n
-        b >>= 1
-    return result
+    """
+    Modular exponentiation by repeated squaring (CLRS 31.6).
+    Delegates to the built-in three-argument pow, which runs the same
+    square-and-multiply (with a sliding window) in C.
+    """
+    if b < 0:
+        raise ValueError("exponent must be non-negative")
+    return pow(a, b, n)
+
+
+# Odd primes below SMALL_PRIME_LIMIT and their product, for a trial-division
+# pre-filter: one C-level gcd rejects ~85% of random odd candidates before
+# any Miller-Rabin exponentiation.
+SMALL_PRIME_LIMIT = 1000
+_SMALL_PRIMES = frozenset(
+    p for p in range(3, SMALL_PRIME_LIMIT, 2)
+    if all(p % f for f in range(3, math.isqrt(p) + 1, 2))
+)
+_SMALL_PRIMORIAL = math.prod(_SMALL_PRIMES)
 
 
 def is_probable_prime(n: int, rounds: int = 40) -> bool:
@@ -64,6 +76,10 @@ def is_probable_prime(n: int, rounds: int = 40) -> bool:
         return True
     if n <= 1 or (n % 2 == 0):
         return False
+    if n < SMALL_PRIME_LIMIT:
+        return n in _SMALL_PRIMES
+    if math.gcd(n, _SMALL_PRIMORIAL) != 1:
+        return False
 
     # write n-1 = 2^t * u with u odd
     u = n - 1
@@ -123,7 +123,7 @@ Xác suất lỗi: ≤ (1/4)^k với k là số round
             return True
         if n % 2 == 0:
             return False
-        for i in range(3, int(n**0.5) + 1, 2):
+        for i in range(3, math.isqrt(n) + 1, 2):
             if n % i == 0:
                 return False
         return True
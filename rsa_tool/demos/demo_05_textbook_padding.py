@@ -11,9 +11,7 @@ def demo_textbook_padding():
     print("╚" + "═" * 78 + "╝")
     print()
     
-    pub, priv = keygen(bits=512)
-    rsa = RSA(pub=pub, priv=priv)
-    pub_only = RSA(pub=pub, priv=None)
+    pub, priv, rsa, pub_only = make_rsa(512)
     
     # VULNERABILITY 1: Deterministic
     print("=" * 80)
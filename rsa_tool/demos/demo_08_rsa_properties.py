@@ -11,7 +11,7 @@ def demo_rsa_properties():
     print("╚" + "═" * 78 + "╝")
     print()
     
-    pub, priv = keygen(bits=512)
+    pub, priv, _, _ = make_rsa(512)
     n = pub.n
     e = pub.e
     d = priv.d
@@ -4,8 +4,10 @@ Shared utilities cho demos
 import sys
 import os
 
-# Add parent directory to import Algorithms
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# Add parent directory to import Algorithms (chỉ insert một lần)
+_PARENT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _PARENT not in sys.path:
+    sys.path.insert(0, _PARENT)
 
 # Common imports for all demos
 from Algorithms.rsa import keygen, RSA, PublicKey, PrivateKey
@@ -14,3 +16,16 @@ from Algorithms.pollard_rho import factor_semiprime
 import time
 import secrets
 import math
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4)
+def make_rsa(bits):
+    """
+    Sinh khóa và cache lại để các demo trong cùng session dùng chung
+    
+    Returns:
+        (pub, priv, rsa, pub_only)
+    """
+    pub, priv = keygen(bits=bits)
+    return pub, priv, RSA(pub=pub, priv=priv), RSA(pub=pub, priv=None)
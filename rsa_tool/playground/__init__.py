@@ -21,14 +21,59 @@ Usage:
     result = PlaygroundService.execute('modular_arithmetic', params)
 """
 
+import copy
+import json
+from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, List, Any
 
+from .playground_utils import create_experiment_id
+
+
+@lru_cache(maxsize=512)
+def _run_cached(lab_id: str, params_key: str) -> Dict[str, Any]:
+    """
+    Chạy lab với params đã serialize (JSON, sort_keys) làm cache key
+    
+    Chỉ dùng cho các mode lab khai báo trong module.CACHEABLE_MODES
+    (kết quả chỉ phụ thuộc params, không có số đo thời gian)
+    """
+    module = PlaygroundService._LABS[lab_id]['module']
+    return module.run(json.loads(params_key))
+
+
+def _serialize_parameters(parameters: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Convert parameter schema (type objects) to JSON-serializable format"""
+    serializable_params = {}
+    for param_name, param_schema in parameters.items():
+        serializable_schema = {}
+        for key, value in param_schema.items():
+            if key == 'type':
+                # Convert type objects to string
+                if value == int:
+                    serializable_schema[key] = 'int'
+                elif value == str:
+                    serializable_schema[key] = 'str'
+                elif value == bool:
+                    serializable_schema[key] = 'bool'
+                elif value == list:
+                    serializable_schema[key] = 'list'
+                else:
+                    serializable_schema[key] = str(value.__name__)
+            else:
+                serializable_schema[key] = value
+        serializable_params[param_name] = serializable_schema
+    return serializable_params
+
 
 class PlaygroundService:
     """Coordinator for research playground modules"""
     
-    # Registry of available labs (will be populated as modules are implemented)
-    _LABS = {}
+    # Registry of available labs: lab_id -> {'module', 'summary', 'info'}
+    # Metadata được snapshot một lần lúc register, _LABS là view read-only
+    _REGISTRY: Dict[str, Dict[str, Any]] = {}
+    _LABS = MappingProxyType(_REGISTRY)
     
     @classmethod
     def register_lab(cls, lab_id: str, lab_module):
@@ -39,7 +84,32 @@ class PlaygroundService:
             lab_id: Unique identifier for the lab
             lab_module: Module containing run() function
         """
-        cls._LABS[lab_id] = lab_module
+        summary = {
+            'id': lab_id,
+            'name': getattr(lab_module, 'NAME', lab_id),
+            'description': getattr(lab_module, 'DESCRIPTION', ''),
+            'phase': getattr(lab_module, 'PHASE', 'unknown'),
+            'clrs_sections': getattr(lab_module, 'CLRS_SECTIONS', []),
+            'status': getattr(lab_module, 'STATUS', 'development')
+        }
+        info = {
+            'id': lab_id,
+            'name': summary['name'],
+            'description': summary['description'],
+            'long_description': getattr(lab_module, 'LONG_DESCRIPTION', ''),
+            'phase': summary['phase'],
+            'clrs_sections': summary['clrs_sections'],
+            'parameters': _serialize_parameters(getattr(lab_module, 'PARAMETERS', {})),
+            'output_format': getattr(lab_module, 'OUTPUT_FORMAT', {}),
+            'examples': getattr(lab_module, 'EXAMPLES', []),
+            'status': summary['status']
+        }
+        # deepcopy: snapshot không dùng chung list/dict nào với module (EXAMPLES, OUTPUT_FORMAT, ...)
+        cls._REGISTRY[lab_id] = {
+            'module': lab_module,
+            'summary': copy.deepcopy(summary),
+            'info': copy.deepcopy(info)
+        }
     
     @classmethod
     def list_all(cls) -> List[Dict[str, Any]]:
@@ -49,17 +119,7 @@ class PlaygroundService:
         Returns:
             List of lab metadata dictionaries
         """
-        labs = []
-        for lab_id, module in cls._LABS.items():
-            labs.append({
-                'id': lab_id,
-                'name': getattr(module, 'NAME', lab_id),
-                'description': getattr(module, 'DESCRIPTION', ''),
-                'phase': getattr(module, 'PHASE', 'unknown'),
-                'clrs_sections': getattr(module, 'CLRS_SECTIONS', []),
-                'status': getattr(module, 'STATUS', 'development')
-            })
-        return labs
+        return [copy.deepcopy(entry['summary']) for entry in cls._LABS.values()]
     
     @classmethod
     def execute(cls, lab_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -68,7 +128,7 @@ class PlaygroundService:
         
         Args:
             lab_id: Lab identifier
-            params: Lab-specific parameters
+            params: Lab-specific parameters ('nocache': True để bỏ qua cache)
             
         Returns:
             Lab results including data, visualizations, export info
@@ -79,11 +139,28 @@ class PlaygroundService:
         if lab_id not in cls._LABS:
             raise ValueError(f"Lab '{lab_id}' not found. Available: {list(cls._LABS.keys())}")
         
-        module = cls._LABS[lab_id]
+        module = cls._LABS[lab_id]['module']
         if not hasattr(module, 'run'):
             raise AttributeError(f"Lab module '{lab_id}' missing run() function")
         
-        return module.run(params)
+        params = dict(params)
+        nocache = params.pop('nocache', False)
+        if nocache or params.get('mode') not in getattr(module, 'CACHEABLE_MODES', ()):
+            return module.run(params)
+        
+        try:
+            params_key = json.dumps(params, sort_keys=True)
+        except TypeError:
+            return module.run(params)
+        
+        # Kết quả cache dùng chung: trả bản deep copy (caller có thể sửa dict lồng
+        # bên trong) với id/timestamp mới
+        result = copy.deepcopy(_run_cached(lab_id, params_key))
+        return {
+            **result,
+            'experiment_id': create_experiment_id(),
+            'timestamp': datetime.now().isoformat()
+        }
     
     @classmethod
     def get_lab_info(cls, lab_id: str) -> Dict[str, Any]:
@@ -99,42 +176,7 @@ class PlaygroundService:
         if lab_id not in cls._LABS:
             raise ValueError(f"Lab '{lab_id}' not found")
         
-        module = cls._LABS[lab_id]
-        
-        # Convert parameters to JSON-serializable format
-        parameters = getattr(module, 'PARAMETERS', {})
-        serializable_params = {}
-        for param_name, param_schema in parameters.items():
-            serializable_schema = {}
-            for key, value in param_schema.items():
-                if key == 'type':
-                    # Convert type objects to string
-                    if value == int:
-                        serializable_schema[key] = 'int'
-                    elif value == str:
-                        serializable_schema[key] = 'str'
-                    elif value == bool:
-                        serializable_schema[key] = 'bool'
-                    elif value == list:
-                        serializable_schema[key] = 'list'
-                    else:
-                        serializable_schema[key] = str(value.__name__)
-                else:
-                    serializable_schema[key] = value
-            serializable_params[param_name] = serializable_schema
-        
-        return {
-            'id': lab_id,
-            'name': getattr(module, 'NAME', lab_id),
-            'description': getattr(module, 'DESCRIPTION', ''),
-            'long_description': getattr(module, 'LONG_DESCRIPTION', ''),
-            'phase': getattr(module, 'PHASE', 'unknown'),
-            'clrs_sections': getattr(module, 'CLRS_SECTIONS', []),
-            'parameters': serializable_params,
-            'output_format': getattr(module, 'OUTPUT_FORMAT', {}),
-            'examples': getattr(module, 'EXAMPLES', []),
-            'status': getattr(module, 'STATUS', 'development')
-        }
+        return copy.deepcopy(cls._LABS[lab_id]['info'])
 
 
 # Import and register implemented labs
@@ -0,0 +1,57 @@
+"""
+Integer kernels dùng chung cho các lab
+
+Các vòng lặp nóng (modexp, order) chỉ làm việc trên int cục bộ, không có
+bookkeeping bên trong. Lab tự tính số phép toán ở ngoài kernel.
+"""
+
+
+def naive_modexp_kernel(a: int, b: int, n: int) -> int:
+    """a^b mod n bằng b phép nhân liên tiếp"""
+    result = 1
+    for _ in range(b):
+        result = result * a % n
+    return result
+
+
+def sam_modexp(a: int, b: int, n: int) -> int:
+    """a^b mod n bằng square-and-multiply (right-to-left)"""
+    result = 1
+    base = a % n
+    while b:
+        if b & 1:
+            result = result * base % n
+        b >>= 1
+        if b:  # Bỏ phép bình phương cuối, kết quả không dùng tới
+            base = base * base % n
+    return result
+
+
+def order_kernel(a: int, n: int, max_k: int) -> int:
+    """k nhỏ nhất <= max_k với a^k ≡ 1 (mod n), -1 nếu không có"""
+    a %= n
+    cur = a
+    for k in range(1, max_k + 1):
+        if cur == 1:
+            return k
+        cur = cur * a % n
+    return -1
+
+
+def euler_phi_kernel(n: int) -> int:
+    """phi(n) bằng trial division: thử 2 rồi chỉ các số lẻ"""
+    result = n
+    if n % 2 == 0:
+        result -= result // 2
+        while n % 2 == 0:
+            n //= 2
+    p = 3
+    while p * p <= n:
+        if n % p == 0:
+            result -= result // p
+            while n % p == 0:
+                n //= p
+        p += 2
+    if n > 1:
+        result -= result // n
+    return result
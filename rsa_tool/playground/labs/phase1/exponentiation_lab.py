@@ -18,6 +18,9 @@ from typing import Dict, Any, List, Tuple, Optional
 import sys
 import os
 import time
+from array import array
+from functools import lru_cache
+from math import isqrt, lcm, gcd
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')))
@@ -31,7 +34,7 @@ from rsa_tool.playground.playground_utils import (
     add_step,
     create_comparison_table
 )
-from Algorithms.utilities import gcd
+from rsa_tool.playground._kernels import naive_modexp_kernel, sam_modexp, order_kernel, euler_phi_kernel
 
 # ============================================================================
 # LAB METADATA
@@ -60,6 +63,8 @@ Perfect for understanding why RSA encryption/decryption is efficient!
 PHASE = 1
 CLRS_SECTIONS = ["31.6"]
 STATUS = "production"
+# Mode có kết quả chỉ phụ thuộc params (không đo thời gian) -> PlaygroundService được cache
+CACHEABLE_MODES = frozenset({'visualize_binary', 'find_primitive_root'})
 
 # ============================================================================
 # PARAMETER SCHEMA
@@ -120,6 +125,10 @@ EXAMPLES = [
 # EXPONENTIATION ALGORITHMS
 # ============================================================================
 
+# Giới hạn exponent cho naive_modexp trong compare_algorithms
+NAIVE_MAX_EXPONENT = 1_000_000
+NAIVE_MAX_EXPONENT_BIGNUM = 10_000
+
 def naive_modexp(a: int, b: int, n: int) -> Tuple[int, Dict[str, int]]:
     """
     Naive modular exponentiation: compute a^b mod n
@@ -127,14 +136,10 @@ def naive_modexp(a: int, b: int, n: int) -> Tuple[int, Dict[str, int]]:
     
     Returns: (result, operations_count)
     """
-    ops = {'multiplications': 0, 'modulo': 0}
+    result = naive_modexp_kernel(a, b, n)
     
-    result = 1
-    for _ in range(b):
-        result = result * a
-        ops['multiplications'] += 1
-        result = result % n
-        ops['modulo'] += 1
+    # Mỗi vòng lặp đúng 1 phép nhân + 1 phép mod nên đếm trực tiếp
+    ops = {'multiplications': b, 'modulo': b}
     
     return result, ops
 
@@ -146,25 +151,18 @@ def square_and_multiply(a: int, b: int, n: int) -> Tuple[int, Dict[str, int]]:
     
     Returns: (result, operations_count)
     """
-    ops = {'multiplications': 0, 'modulo': 0, 'squares': 0, 'multiplies': 0}
-    
-    result = 1
-    base = a % n
-    ops['modulo'] += 1
+    # Số phép toán chỉ phụ thuộc vào b: mỗi bit (trừ bit cao nhất)
+    # 1 phép bình phương, mỗi bit 1 thêm 1 phép nhân
+    squares = max(b.bit_length() - 1, 0)
+    multiplies = bin(b).count('1')
+    ops = {
+        'multiplications': squares + multiplies,
+        'modulo': squares + multiplies + 1,
+        'squares': squares,
+        'multiplies': multiplies
+    }
     
-    while b > 0:
-        if b % 2 == 1:
-            result = (result * base) % n
-            ops['multiplications'] += 1
-            ops['multiplies'] += 1
-            ops['modulo'] += 1
-        
-        base = (base * base) % n
-        ops['multiplications'] += 1
-        ops['squares'] += 1
-        ops['modulo'] += 1
-        
-        b = b // 2
+    result = sam_modexp(a, b, n)
     
     return result, ops
 
@@ -175,43 +173,47 @@ def square_and_multiply_detailed(a: int, b: int, n: int) -> Tuple[int, List[Dict
     
     Returns: (result, steps)
     """
-    steps = []
+    L = max(b.bit_length(), 1)
+    steps = [None] * (L + 2)
     
     # Binary representation
-    binary = bin(b)[2:]  # Remove '0b' prefix
-    steps.append({
+    binary = format(b, 'b')  # Chỉ dùng cho log, vòng lặp bên dưới đọc bit trực tiếp
+    steps[0] = {
         'operation': 'Binary representation',
         'binary': binary,
         'description': f'{b} in binary = {binary}'
-    })
+    }
     
     result = 1
     base = a % n
     
-    steps.append({
+    steps[1] = {
         'operation': 'Initialize',
         'result': result,
         'base': base,
         'description': f'result = 1, base = {a} mod {n} = {base}'
-    })
+    }
     
-    for i, bit in enumerate(reversed(binary)):
-        step_info = {'bit_position': i, 'bit_value': bit}
+    bb = b
+    for i in range(L):
+        bit = bb & 1
+        bb >>= 1
+        step_info = {'bit_position': i, 'bit_value': '1' if bit else '0'}
         
-        if bit == '1':
+        if bit:
             old_result = result
             result = (result * base) % n
             step_info['operation'] = 'Multiply'
             step_info['calculation'] = f'{old_result} * {base} mod {n} = {result}'
             step_info['result'] = result
         
-        if i < len(binary) - 1:  # Don't square on last iteration
+        if i < L - 1:  # Don't square on last iteration
             old_base = base
             base = (base * base) % n
             step_info['square'] = f'{old_base}^2 mod {n} = {base}'
             step_info['base'] = base
         
-        steps.append(step_info)
+        steps[i + 2] = step_info
     
     return result, steps
 
@@ -231,47 +233,146 @@ def compute_order(a: int, n: int, max_order: int = 10000) -> Optional[int]:
     if gcd(a, n) != 1:
         return None  # a must be coprime to n
     
-    current = a % n
-    for k in range(1, min(max_order, n) + 1):
-        if current == 1:
-            return k
-        current = (current * a) % n
+    if n < SPF_LIMIT:
+        # order | λ(n): bắt đầu từ λ(n) rồi bỏ dần các ước nguyên tố q
+        # còn thỏa a^(order/q) ≡ 1, chỉ tốn O(Ω(λ) · log n) phép pow
+        order = carmichael(n)
+        for q in _prime_factors(order):
+            while order % q == 0 and pow(a, order // q, n) == 1:
+                order //= q
+        return order if order <= max_order else None
     
-    return None
+    k = order_kernel(a, n, min(max_order, n))
+    return k if k > 0 else None
+
 
+SPF_LIMIT = 1 << 20
+
+
+@lru_cache(maxsize=1)
+def _spf_sieve(limit: int) -> array:
+    """
+    Smallest-prime-factor table cho mọi số < limit (spf[0] = spf[1] = 0)
+    """
+    spf = array('i', range(limit))
+    spf[0] = spf[1] = 0
+    # Duyệt số nguyên tố từ lớn xuống nhỏ để p nhỏ nhất ghi đè sau cùng
+    small = [p for p in range(2, isqrt(limit - 1) + 1) if all(p % q for q in range(2, isqrt(p) + 1))]
+    for p in reversed(small):
+        count = len(range(p * p, limit, p))
+        spf[p * p::p] = array('i', [p]) * count
+    return spf
 
+
+@lru_cache(maxsize=4096)
 def euler_phi(n: int) -> int:
     """
     Compute Euler's totient function phi(n)
     Number of integers in [1, n] coprime to n
-    """
-    result = n
-    p = 2
     
-    while p * p <= n:
-        if n % p == 0:
+    n < SPF_LIMIT dùng bảng smallest-prime-factor, O(log n) lookups;
+    n lớn hơn fallback về trial division.
+    """
+    if n < SPF_LIMIT:
+        if n < 2:
+            return n
+        spf = _spf_sieve(SPF_LIMIT)
+        result = n
+        while n > 1:
+            p = spf[n]
+            result -= result // p
             while n % p == 0:
                 n //= p
-            result -= result // p
-        p += 1
+        return result
     
-    if n > 1:
-        result -= result // n
+    return euler_phi_kernel(n)
+
+
+@lru_cache(maxsize=4096)
+def carmichael(n: int) -> int:
+    """
+    Carmichael function λ(n): số mũ nhỏ nhất để a^λ(n) ≡ 1 (mod n) với mọi a ∈ Z*_n
     
+    λ(p^k) = p^(k-1)·(p-1), riêng λ(2^k) = 2^(k-2) khi k >= 3;
+    λ(n) là lcm của các thành phần. Luôn có λ(n) | φ(n).
+    """
+    result = 1
+    for p in _prime_factors(n):
+        pk = 1
+        while n % p == 0:
+            n //= p
+            pk *= p
+        if p == 2 and pk >= 8:
+            lam = pk // 4
+        else:
+            lam = pk // p * (p - 1)
+        result = lcm(result, lam)
     return result
 
 
+@lru_cache(maxsize=4096)
+def _prime_factors(m: int) -> Tuple[int, ...]:
+    """Các ước nguyên tố phân biệt của m (SPF table nếu m nhỏ, ngược lại trial division)"""
+    factors = []
+    if m < SPF_LIMIT:
+        spf = _spf_sieve(SPF_LIMIT)
+        while m > 1:
+            p = spf[m]
+            factors.append(p)
+            while m % p == 0:
+                m //= p
+        return tuple(factors)
+    
+    p = 2
+    while p * p <= m:
+        if m % p == 0:
+            factors.append(p)
+            while m % p == 0:
+                m //= p
+        p += 1
+    if m > 1:
+        factors.append(m)
+    return tuple(factors)
+
+
+@lru_cache(maxsize=4096)
+def _factor_phi(n: int) -> Tuple[int, ...]:
+    """Ước nguyên tố của phi(n), cache theo n"""
+    return _prime_factors(euler_phi(n))
+
+
+def _has_primitive_root(n: int) -> bool:
+    """
+    Z*_n có primitive root khi và chỉ khi n ∈ {1, 2, 4} hoặc n = p^k, 2·p^k
+    với p là số nguyên tố lẻ
+    """
+    if n in (1, 2, 4):
+        return True
+    if n % 2 == 0:
+        n //= 2
+        if n % 2 == 0:
+            return False
+    return len(_prime_factors(n)) == 1
+
+
 def is_primitive_root(a: int, n: int, phi_n: Optional[int] = None) -> bool:
     """
     Check if a is a primitive root modulo n
     
-    A primitive root is an element whose order equals phi(n)
+    A primitive root is an element whose order equals phi(n).
+    Lucas test: a là primitive root khi và chỉ khi gcd(a, n) = 1 và
+    a^(phi(n)/q) != 1 (mod n) với mọi ước nguyên tố q của phi(n).
     """
+    if gcd(a, n) != 1:
+        return False
+    
     if phi_n is None:
         phi_n = euler_phi(n)
+        factors = _factor_phi(n)
+    else:
+        factors = _prime_factors(phi_n)
     
-    order = compute_order(a, n, phi_n + 1)
-    return order == phi_n
+    return all(pow(a, phi_n // q, n) != 1 for q in factors)
 
 
 # ============================================================================
@@ -299,19 +400,22 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         
         print(f"Computing {a}^{b} mod {n}...")
         
-        comparison = {}
+        bl = b.bit_length()
+        # Kernel naive không còn bookkeeping: ~0.15s cho 10^6 vòng với n <= 63 bit
+        naive_limit = NAIVE_MAX_EXPONENT if n.bit_length() <= 63 else NAIVE_MAX_EXPONENT_BIGNUM
+        run_naive = b <= naive_limit
         
         # Naive method (only for small b to avoid timeout)
-        if b <= 10000:
+        if run_naive:
             result_naive, time_naive = benchmark(naive_modexp, a, b, n)
-            comparison['naive'] = {
+            naive_entry = {
                 'result': result_naive[0],
                 'operations': result_naive[1],
                 'time_ms': time_naive,
                 'complexity': f'O({b})'
             }
         else:
-            comparison['naive'] = {
+            naive_entry = {
                 'result': None,
                 'operations': None,
                 'time_ms': None,
@@ -321,29 +425,33 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         
         # Square-and-multiply
         result_sam, time_sam = benchmark(square_and_multiply, a, b, n)
-        comparison['square_and_multiply'] = {
-            'result': result_sam[0],
-            'operations': result_sam[1],
-            'time_ms': time_sam,
-            'complexity': f'O(log {b}) = O({b.bit_length()})'
-        }
         
         # Built-in pow (for reference)
         result_builtin, time_builtin = benchmark(pow, a, b, n)
-        comparison['python_builtin'] = {
-            'result': result_builtin,
-            'time_ms': time_builtin,
-            'note': 'Optimized C implementation'
+        
+        comparison = {
+            'naive': naive_entry,
+            'square_and_multiply': {
+                'result': result_sam[0],
+                'operations': result_sam[1],
+                'time_ms': time_sam,
+                'complexity': f'O(log {b}) = O({bl})'
+            },
+            'python_builtin': {
+                'result': result_builtin,
+                'time_ms': time_builtin,
+                'note': 'Optimized C implementation'
+            }
         }
         
         results = {
             'a': a,
             'b': b,
             'n': n,
-            'b_bits': b.bit_length(),
+            'b_bits': bl,
             'result': result_sam[0],
             'comparison': comparison,
-            'speedup': time_naive / time_sam if b <= 10000 and time_sam > 0 else None
+            'speedup': time_naive / time_sam if run_naive and time_sam > 0 else None
         }
     
     elif mode == 'visualize_binary':
@@ -393,17 +501,16 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
             
             is_primitive = order == phi_n
             
-            # Show powers
-            powers = []
+            # Show powers: a^1 .. a^min(order, 19), a^order là phần tử cuối ≡ 1
+            count = min(order, 19) if order else 0
+            powers = [None] * count
             current = a
-            for k in range(1, min(order + 1, 20)):
-                powers.append({
-                    'k': k,
+            for i in range(count):
+                powers[i] = {
+                    'k': i + 1,
                     'a_to_k': current,
                     'congruent_to_1': current == 1
-                })
-                if current == 1:
-                    break
+                }
                 current = (current * a) % n
             
             results = {
@@ -413,7 +520,7 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
                 'order': order,
                 'is_primitive_root': is_primitive,
                 'time_ms': time_taken,
-                'powers': powers if len(powers) <= 20 else powers[:20] + [{'note': '... truncated'}]
+                'powers': powers
             }
     
     elif mode == 'find_primitive_root':
@@ -427,22 +534,38 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         phi_n = euler_phi(n)
         primitive_roots = []
         
-        # Search for primitive roots
-        for a in range(2, min(n, 100)):
-            if gcd(a, n) == 1:
-                if is_primitive_root(a, n, phi_n):
+        if not _has_primitive_root(n):
+            # Không cần scan: Z*_n không cyclic
+            results = {
+                'n': n,
+                'phi_n': phi_n,
+                'primitive_roots': primitive_roots,
+                'count': 0,
+                'search_range': 0,
+                'reason': 'n has no primitive root',
+                'note': 'Primitive roots only exist for n = 1, 2, 4, p^k, 2p^k (p odd prime)'
+            }
+        else:
+            # Lucas test: số mũ phi(n)/q chỉ tính một lần cho cả vòng search
+            exponents = [phi_n // q for q in _factor_phi(n)]
+            
+            # Search for primitive roots (math.gcd + builtin pow đều chạy ở C)
+            for a in range(2, min(n, 100)):
+                if gcd(a, n) != 1:
+                    continue
+                if all(pow(a, e, n) != 1 for e in exponents):
                     primitive_roots.append(a)
                     if len(primitive_roots) >= 10:  # Limit to first 10
                         break
-        
-        results = {
-            'n': n,
-            'phi_n': phi_n,
-            'primitive_roots': primitive_roots,
-            'count': len(primitive_roots),
-            'search_range': min(n, 100),
-            'note': 'Primitive roots have order phi(n)' if primitive_roots else 'No primitive roots found in range'
-        }
+            
+            results = {
+                'n': n,
+                'phi_n': phi_n,
+                'primitive_roots': primitive_roots,
+                'count': len(primitive_roots),
+                'search_range': min(n, 100),
+                'note': 'Primitive roots have order phi(n)' if primitive_roots else 'No primitive roots found in range'
+            }
     
     else:
         raise ValueError(f"Unknown mode: {mode}")
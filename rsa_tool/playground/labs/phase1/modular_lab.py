@@ -17,6 +17,7 @@ CLRS Sections:
 - 31.4: Solving modular linear equations
 """
 
+import math
 from typing import Dict, Any, List, Tuple
 from rsa_tool.playground.playground_utils import (
     create_experiment_id,
@@ -25,7 +26,8 @@ from rsa_tool.playground.playground_utils import (
     validate_parameters,
     create_step_log,
     add_step,
-    create_comparison_table
+    create_comparison_table,
+    cached_modinv
 )
 
 # ============================================================================
@@ -55,6 +57,9 @@ PHASE = 1
 CLRS_SECTIONS = ["31.1", "31.2", "31.3", "31.4"]
 STATUS = "production"
 
+# compare: số lần lặp mỗi thuật toán GCD khi đo thời gian (một lần gọi chỉ vài µs)
+COMPARE_REPEAT = 100
+
 # ============================================================================
 # PARAMETER SCHEMA
 # ============================================================================
@@ -167,28 +172,38 @@ EXAMPLES = [
 # CORE ALGORITHMS
 # ============================================================================
 
-def extended_gcd(a: int, b: int, show_steps: bool = True) -> Dict[str, Any]:
+def _extended_gcd_fast(a: int, b: int) -> Tuple[int, int, int, int]:
     """
-    Extended Euclidean Algorithm (CLRS 31.2)
+    Extended Euclid không trace: chỉ có phép toán trong vòng lặp
     
-    Computes gcd(a, b) and Bézout coefficients x, y such that:
-    ax + by = gcd(a, b)
-    
-    Args:
-        a, b: Input integers
-        show_steps: Include step-by-step trace
-        
-    Returns:
-        Dictionary with gcd, x, y, steps, operation_count
+    Returns: (gcd, x, y, iterations)
     """
-    steps = create_step_log() if show_steps else None
+    old_r, r = a, b
+    old_s, s = 1, 0
+    old_t, t = 0, 1
+    
+    iteration = 0
+    while r:
+        iteration += 1
+        # divmod trả cả thương và dư trong một phép chia: bỏ được old_r - quotient * r,
+        # phép nhân/trừ trên toán hạng lớn nhất của vòng lặp
+        quotient, remainder = divmod(old_r, r)
+        old_r, r = r, remainder
+        old_s, s = s, old_s - quotient * s
+        old_t, t = t, old_t - quotient * t
+    
+    return old_r, old_s, old_t, iteration
+
+
+def _extended_gcd_traced(a: int, b: int) -> Dict[str, Any]:
+    """Extended Euclid kèm step-by-step trace, xem extended_gcd"""
+    steps = create_step_log()
     operation_count = 0
     
     # Keep original values for verification
     orig_a, orig_b = a, b
     
-    if show_steps:
-        add_step(steps, f"Start: Find gcd({a}, {b})", {'a': a, 'b': b})
+    add_step(steps, f"Start: Find gcd({a}, {b})", {'a': a, 'b': b})
     
     # Initialize
     old_r, r = a, b
@@ -201,9 +216,8 @@ def extended_gcd(a: int, b: int, show_steps: bool = True) -> Dict[str, Any]:
         quotient = old_r // r
         operation_count += 1  # Division
         
-        if show_steps:
-            add_step(steps, f"Iteration {iteration}: quotient = {old_r} // {r} = {quotient}",
-                    {'quotient': quotient, 'old_r': old_r, 'r': r})
+        add_step(steps, f"Iteration {iteration}: quotient = {old_r} // {r} = {quotient}",
+                {'quotient': quotient, 'old_r': old_r, 'r': r})
         
         # Update r
         old_r, r = r, old_r - quotient * r
@@ -217,18 +231,16 @@ def extended_gcd(a: int, b: int, show_steps: bool = True) -> Dict[str, Any]:
         old_t, t = t, old_t - quotient * t
         operation_count += 2
         
-        if show_steps:
-            add_step(steps, f"After iteration {iteration}",
-                    {'r': r, 's': s, 't': t, 'gcd_candidate': old_r})
+        add_step(steps, f"After iteration {iteration}",
+                {'r': r, 's': s, 't': t, 'gcd_candidate': old_r})
     
     gcd = old_r
     x, y = old_s, old_t
     
-    if show_steps:
-        add_step(steps, f"Final: gcd = {gcd}, x = {x}, y = {y}", 
-                {'gcd': gcd, 'x': x, 'y': y})
-        add_step(steps, f"Verification: {orig_a}×{x} + {orig_b}×{y} = {orig_a*x + orig_b*y}",
-                {'verification': orig_a*x + orig_b*y == gcd})
+    add_step(steps, f"Final: gcd = {gcd}, x = {x}, y = {y}", 
+            {'gcd': gcd, 'x': x, 'y': y})
+    add_step(steps, f"Verification: {orig_a}×{x} + {orig_b}×{y} = {orig_a*x + orig_b*y}",
+            {'verification': orig_a*x + orig_b*y == gcd})
     
     return {
         'gcd': gcd,
@@ -240,6 +252,46 @@ def extended_gcd(a: int, b: int, show_steps: bool = True) -> Dict[str, Any]:
     }
 
 
+def extended_gcd(a: int, b: int, show_steps: bool = True,
+                 need_bezout: bool = True) -> Dict[str, Any]:
+    """
+    Extended Euclidean Algorithm (CLRS 31.2)
+    
+    Computes gcd(a, b) and Bézout coefficients x, y such that:
+    ax + by = gcd(a, b)
+    
+    Args:
+        a, b: Input integers
+        show_steps: Include step-by-step trace
+        need_bezout: False nếu chỉ cần gcd -> math.gcd (C), x và y là None
+        
+    Returns:
+        Dictionary with gcd, x, y, steps, operation_count
+    """
+    if show_steps:
+        return _extended_gcd_traced(a, b)
+    
+    if not need_bezout:
+        return {
+            'gcd': math.gcd(a, b),
+            'x': None,
+            'y': None,
+            'steps': None,
+            'operation_count': 0,
+            'verification': None
+        }
+    
+    gcd, x, y, iterations = _extended_gcd_fast(a, b)
+    return {
+        'gcd': gcd,
+        'x': x,
+        'y': y,
+        'steps': None,
+        'operation_count': 7 * iterations,  # 1 phép chia + 3 × (nhân, trừ) mỗi iteration
+        'verification': a * x + b * y
+    }
+
+
 def mod_inverse(a: int, m: int, show_steps: bool = True) -> Dict[str, Any]:
     """
     Compute modular inverse: a^(-1) mod m (CLRS 31.4)
@@ -255,10 +307,28 @@ def mod_inverse(a: int, m: int, show_steps: bool = True) -> Dict[str, Any]:
     Returns:
         Dictionary with inverse, exists, steps
     """
-    steps = create_step_log() if show_steps else None
+    if not show_steps:
+        # Không cần trace: pow(a, -1, m) chạy Extended Euclid trong C
+        try:
+            inverse = pow(a % m, -1, m)
+        except ValueError:
+            gcd = math.gcd(a, m)
+            return {
+                'inverse': None,
+                'exists': False,
+                'reason': f"gcd({a}, {m}) = {gcd} ≠ 1",
+                'steps': None
+            }
+        return {
+            'inverse': inverse,
+            'exists': True,
+            'gcd': 1,
+            'steps': None,
+            'verification': (a * inverse) % m
+        }
     
-    if show_steps:
-        add_step(steps, f"Find {a}^(-1) mod {m}", {'a': a, 'm': m})
+    steps = create_step_log()
+    add_step(steps, f"Find {a}^(-1) mod {m}", {'a': a, 'm': m})
     
     # Use Extended Euclidean
     result = extended_gcd(a, m, show_steps=False)
@@ -266,9 +336,8 @@ def mod_inverse(a: int, m: int, show_steps: bool = True) -> Dict[str, Any]:
     x = result['x']
     
     if gcd != 1:
-        if show_steps:
-            add_step(steps, f"No inverse: gcd({a}, {m}) = {gcd} ≠ 1",
-                    {'gcd': gcd, 'inverse_exists': False})
+        add_step(steps, f"No inverse: gcd({a}, {m}) = {gcd} ≠ 1",
+                {'gcd': gcd, 'inverse_exists': False})
         return {
             'inverse': None,
             'exists': False,
@@ -279,14 +348,13 @@ def mod_inverse(a: int, m: int, show_steps: bool = True) -> Dict[str, Any]:
     # Normalize to positive
     inverse = x % m
     
-    if show_steps:
-        add_step(steps, f"gcd({a}, {m}) = 1, so inverse exists", {'gcd': gcd})
-        add_step(steps, f"From Extended Euclidean: {a}×{x} + {m}×{result['y']} = 1",
-                {'x': x, 'y': result['y']})
-        add_step(steps, f"Therefore: {a}×{x} ≡ 1 (mod {m})", {'x': x})
-        add_step(steps, f"Normalized: {a}^(-1) ≡ {inverse} (mod {m})", {'inverse': inverse})
-        add_step(steps, f"Verification: {a}×{inverse} mod {m} = {(a * inverse) % m}",
-                {'verification': (a * inverse) % m})
+    add_step(steps, f"gcd({a}, {m}) = 1, so inverse exists", {'gcd': gcd})
+    add_step(steps, f"From Extended Euclidean: {a}×{x} + {m}×{result['y']} = 1",
+            {'x': x, 'y': result['y']})
+    add_step(steps, f"Therefore: {a}×{x} ≡ 1 (mod {m})", {'x': x})
+    add_step(steps, f"Normalized: {a}^(-1) ≡ {inverse} (mod {m})", {'inverse': inverse})
+    add_step(steps, f"Verification: {a}×{inverse} mod {m} = {(a * inverse) % m}",
+            {'verification': (a * inverse) % m})
     
     return {
         'inverse': inverse,
@@ -318,8 +386,8 @@ def solve_modular_equation(a: int, b: int, m: int, show_steps: bool = True) -> D
     if show_steps:
         add_step(steps, f"Solve: {a}x ≡ {b} (mod {m})", {'a': a, 'b': b, 'm': m})
     
-    # Compute gcd(a, m)
-    result = extended_gcd(a, m, show_steps=False)
+    # Compute gcd(a, m): chỉ cần giá trị gcd, không cần Bézout
+    result = extended_gcd(a, m, show_steps=False, need_bezout=False)
     d = result['gcd']
     
     if show_steps:
@@ -351,9 +419,10 @@ def solve_modular_equation(a: int, b: int, m: int, show_steps: bool = True) -> D
         add_step(steps, f"Divide by {d}: {a_prime}x ≡ {b_prime} (mod {m_prime})",
                 {'a_prime': a_prime, 'b_prime': b_prime, 'm_prime': m_prime})
     
-    # Find inverse of a_prime mod m_prime
-    inv_result = mod_inverse(a_prime, m_prime, show_steps=False)
-    a_inv = inv_result['inverse']
+    # Find inverse of a_prime mod m_prime: gcd(a', m') = 1 nên luôn tồn tại.
+    # math.gcd + pow (đều chạy trong C) vẫn nhanh hơn một lượt Extended Euclid bằng Python
+    # để lấy Bézout, nên gọi thẳng pow thay vì đi qua mod_inverse
+    a_inv = pow(a_prime, -1, m_prime)
     
     if show_steps:
         add_step(steps, f"Find {a_prime}^(-1) mod {m_prime} = {a_inv}",
@@ -388,6 +457,16 @@ def solve_modular_equation(a: int, b: int, m: int, show_steps: bool = True) -> D
     }
 
 
+def _first_common_factor(n_values: List[int]) -> Tuple[int, int, int]:
+    """Cặp (n_i, n_j), i < j, đầu tiên có gcd > 1 theo thứ tự i rồi j; trả về (n_i, n_j, gcd)"""
+    for i, n_i in enumerate(n_values):
+        for n_j in n_values[i + 1:]:
+            d = math.gcd(n_i, n_j)
+            if d != 1:
+                return n_i, n_j, d
+    raise ValueError("moduli are pairwise coprime")
+
+
 def chinese_remainder_theorem(congruences: List[List[int]], show_steps: bool = True) -> Dict[str, Any]:
     """
     Solve system of congruences using CRT (CLRS 31.5)
@@ -410,64 +489,61 @@ def chinese_remainder_theorem(congruences: List[List[int]], show_steps: bool = T
         congruence_str = ", ".join([f"x ≡ {a} (mod {n})" for a, n in congruences])
         add_step(steps, f"Solve system: {congruence_str}", {'congruences': congruences})
     
-    # Check pairwise coprimality
+    # Check pairwise coprimality: n_j nguyên tố cùng nhau với mọi n_i (i < j)
+    # iff gcd(n_j, n_0 × ... × n_(j-1)) = 1 -> một gcd mỗi modulus thay vì O(k²) cặp.
+    # Tích chạy cũng chính là N.
     n_values = [n for _, n in congruences]
-    for i in range(len(n_values)):
-        for j in range(i + 1, len(n_values)):
-            gcd_result = extended_gcd(n_values[i], n_values[j], show_steps=False)
-            if gcd_result['gcd'] != 1:
-                if show_steps:
-                    add_step(steps, f"Error: gcd({n_values[i]}, {n_values[j]}) = {gcd_result['gcd']} ≠ 1",
-                            {'not_coprime': [n_values[i], n_values[j]]})
-                return {
-                    'solution': None,
-                    'exists': False,
-                    'reason': f"Moduli not pairwise coprime: gcd({n_values[i]}, {n_values[j]}) = {gcd_result['gcd']}",
-                    'steps': steps
-                }
+    N = 1
+    for n_j in n_values:
+        if math.gcd(n_j, N) != 1:
+            # Hiếm: quét lại các cặp theo thứ tự (i, j) để báo đúng cặp đầu tiên
+            n_i, n_k, d = _first_common_factor(n_values)
+            if show_steps:
+                add_step(steps, f"Error: gcd({n_i}, {n_k}) = {d} ≠ 1",
+                        {'not_coprime': [n_i, n_k]})
+            return {
+                'solution': None,
+                'exists': False,
+                'reason': f"Moduli not pairwise coprime: gcd({n_i}, {n_k}) = {d}",
+                'steps': steps
+            }
+        N *= n_j
     
     if show_steps:
         add_step(steps, "All moduli pairwise coprime ✓", {'coprime': True})
     
-    # Compute N = product of all moduli
-    N = 1
-    for _, n in congruences:
-        N *= n
-    
     if show_steps:
         add_step(steps, f"N = {' × '.join(map(str, n_values))} = {N}", {'N': N})
     
-    # CRT construction
+    # CRT construction (Garner): x giữ nghiệm của các congruence đã xét, mod P = n_1 × ... × n_(i-1).
+    # x_mới = x + t × P với t = (a_i - x) × P^(-1) mod n_i; chỉ nghịch đảo/rút gọn theo n_i nhỏ,
+    # không cần N // n_i hay tổng các số hạng cỡ k × N.
     x = 0
+    P = 1
     crt_components = []
     
     for i, (a_i, n_i) in enumerate(congruences):
-        N_i = N // n_i
-        
-        # Find M_i such that N_i × M_i ≡ 1 (mod n_i)
-        inv_result = mod_inverse(N_i, n_i, show_steps=False)
-        M_i = inv_result['inverse']
-        
-        term = a_i * N_i * M_i
-        x += term
+        # P^(-1) mod n_i tồn tại vì các moduli đôi một nguyên tố cùng nhau
+        P_inv = cached_modinv(P, n_i)
+        t = ((a_i - x) * P_inv) % n_i
+        x += t * P
         
         crt_components.append({
             'a_i': a_i,
             'n_i': n_i,
-            'N_i': N_i,
-            'M_i': M_i,
-            'term': term
+            'P_i': P,
+            'P_inv': P_inv,
+            't_i': t
         })
         
         if show_steps:
-            add_step(steps, f"Congruence {i+1}: N_{i+1} = {N_i}, M_{i+1} = {M_i}",
-                    {'N_i': N_i, 'M_i': M_i, 'term': term})
-    
-    # Reduce modulo N
-    x = x % N
+            add_step(steps, f"Congruence {i+1}: P_{i+1} = {P}, P_{i+1}^(-1) mod {n_i} = {P_inv}, t_{i+1} = {t}",
+                    {'P_i': P, 'P_inv': P_inv, 't_i': t, 'x': x})
+        
+        P *= n_i
     
     if show_steps:
-        add_step(steps, f"Sum all terms and reduce: x ≡ {x} (mod {N})", {'x': x})
+        add_step(steps, f"Result: x ≡ {x} (mod {N})", {'x': x})
         
         # Verify
         verifications = []
@@ -475,6 +551,11 @@ def chinese_remainder_theorem(congruences: List[List[int]], show_steps: bool = T
             check = x % n_i
             verifications.append({'expected': a_i, 'actual': check, 'match': check == a_i})
         add_step(steps, "Verification of all congruences", {'verifications': verifications})
+        verified = all(v['match'] for v in verifications)
+    else:
+        # Garner dựng x ≡ a_i (mod n_i) với mọi i, nên x % n_i == a_i khi và chỉ khi
+        # 0 <= a_i < n_i: kiểm tra bất biến này thay vì k phép chia big-int
+        verified = all(0 <= a < n for a, n in congruences)
     
     return {
         'solution': x,
@@ -482,7 +563,7 @@ def chinese_remainder_theorem(congruences: List[List[int]], show_steps: bool = T
         'modulus': N,
         'crt_components': crt_components,
         'steps': steps,
-        'verification': all((x % n) == a for a, n in congruences)
+        'verification': verified
     }
 
 
@@ -501,7 +582,7 @@ def compare_algorithms(a: int, b: int, show_steps: bool = True) -> Dict[str, Any
         add_step(steps, f"Compare GCD algorithms for ({a}, {b})", {'a': a, 'b': b})
     
     # Extended Euclidean
-    result_ext, time_ext = benchmark(extended_gcd, a, b, show_steps=False)
+    result_ext, time_ext = benchmark(extended_gcd, a, b, show_steps=False, repeat=COMPARE_REPEAT)
     
     # Naive GCD (for comparison)
     def naive_gcd(a, b):
@@ -511,7 +592,25 @@ def compare_algorithms(a: int, b: int, show_steps: bool = True) -> Dict[str, Any
             ops += 1
         return {'gcd': a, 'operation_count': ops}
     
-    result_naive, time_naive = benchmark(naive_gcd, a, b)
+    result_naive, time_naive = benchmark(naive_gcd, a, b, repeat=COMPARE_REPEAT)
+    
+    # Binary GCD (Stein): chỉ shift và trừ, ctz(x) = (x & -x).bit_length() - 1
+    def binary_gcd(a, b):
+        a, b = abs(a), abs(b)
+        if not a or not b:
+            return {'gcd': a or b, 'operation_count': 0}
+        shift = ((a | b) & -(a | b)).bit_length() - 1
+        a >>= (a & -a).bit_length() - 1
+        ops = 0
+        while b:
+            b >>= (b & -b).bit_length() - 1
+            if a > b:
+                a, b = b, a
+            b -= a
+            ops += 1
+        return {'gcd': a << shift, 'operation_count': ops}
+    
+    result_binary, time_binary = benchmark(binary_gcd, a, b, repeat=COMPARE_REPEAT)
     
     results = {
         'extended_euclidean': {
@@ -525,6 +624,12 @@ def compare_algorithms(a: int, b: int, show_steps: bool = True) -> Dict[str, Any
             'time_ms': time_naive,
             'operations': result_naive['operation_count'],
             'provides_bezout': False
+        },
+        'binary_gcd': {
+            'gcd': result_binary['gcd'],
+            'time_ms': time_binary,
+            'operations': result_binary['operation_count'],
+            'provides_bezout': False
         }
     }
     
@@ -533,7 +638,7 @@ def compare_algorithms(a: int, b: int, show_steps: bool = True) -> Dict[str, Any
     
     # Create comparison table
     table = create_comparison_table(
-        algorithms=['Extended Euclidean', 'Naive GCD'],
+        algorithms=['Extended Euclidean', 'Naive GCD', 'Binary GCD'],
         metrics=['GCD', 'Time (ms)', 'Operations', 'Bézout Coefficients'],
         results={
             'Extended Euclidean': {
@@ -547,6 +652,12 @@ def compare_algorithms(a: int, b: int, show_steps: bool = True) -> Dict[str, Any
                 'Time (ms)': f"{time_naive:.4f}",
                 'Operations': result_naive['operation_count'],
                 'Bézout Coefficients': 'No'
+            },
+            'Binary GCD': {
+                'GCD': result_binary['gcd'],
+                'Time (ms)': f"{time_binary:.4f}",
+                'Operations': result_binary['operation_count'],
+                'Bézout Coefficients': 'No'
             }
         }
     )
@@ -562,6 +673,26 @@ def compare_algorithms(a: int, b: int, show_steps: bool = True) -> Dict[str, Any
 # MAIN ENTRY POINT
 # ============================================================================
 
+# mode -> (hàm, các params bắt buộc theo đúng thứ tự đối số); show_steps luôn là đối số cuối
+_MODES = {
+    'extended_gcd': (extended_gcd, ('a', 'b')),
+    'mod_inverse': (mod_inverse, ('a', 'm')),
+    'solve_equation': (solve_modular_equation, ('a', 'b', 'm')),
+    'crt': (chinese_remainder_theorem, ('congruences',)),
+    'compare': (compare_algorithms, ('a', 'b')),
+}
+
+
+def _describe_params(names: Tuple[str, ...]) -> str:
+    """"'a', 'b', and 'm' parameters" cho thông báo lỗi"""
+    quoted = [f"'{name}'" for name in names]
+    if len(quoted) == 1:
+        return f"{quoted[0]} parameter"
+    if len(quoted) == 2:
+        return f"{quoted[0]} and {quoted[1]} parameters"
+    return f"{', '.join(quoted[:-1])}, and {quoted[-1]} parameters"
+
+
 def run(params: Dict[str, Any]) -> Dict[str, Any]:
     """
     Main entry point for Modular Arithmetic Lab
@@ -585,45 +716,17 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
     exp_id = create_experiment_id()
     
     # Execute based on mode
-    if mode == 'extended_gcd':
-        if 'a' not in params or 'b' not in params:
-            raise ValueError("extended_gcd mode requires 'a' and 'b' parameters")
-        
-        result, time_ms = benchmark(extended_gcd, params['a'], params['b'], show_steps)
-        result['benchmark'] = {'time_ms': time_ms}
-        
-    elif mode == 'mod_inverse':
-        if 'a' not in params or 'm' not in params:
-            raise ValueError("mod_inverse mode requires 'a' and 'm' parameters")
-        
-        result, time_ms = benchmark(mod_inverse, params['a'], params['m'], show_steps)
-        result['benchmark'] = {'time_ms': time_ms}
-        
-    elif mode == 'solve_equation':
-        if 'a' not in params or 'b' not in params or 'm' not in params:
-            raise ValueError("solve_equation mode requires 'a', 'b', and 'm' parameters")
-        
-        result, time_ms = benchmark(solve_modular_equation, 
-                                   params['a'], params['b'], params['m'], show_steps)
-        result['benchmark'] = {'time_ms': time_ms}
-        
-    elif mode == 'crt':
-        if 'congruences' not in params:
-            raise ValueError("crt mode requires 'congruences' parameter")
-        
-        result, time_ms = benchmark(chinese_remainder_theorem, params['congruences'], show_steps)
-        result['benchmark'] = {'time_ms': time_ms}
-        
-    elif mode == 'compare':
-        if 'a' not in params or 'b' not in params:
-            raise ValueError("compare mode requires 'a' and 'b' parameters")
-        
-        result, time_ms = benchmark(compare_algorithms, params['a'], params['b'], show_steps)
-        result['benchmark'] = {'time_ms': time_ms}
-        
-    else:
+    if mode not in _MODES:
         raise ValueError(f"Unknown mode: {mode}")
     
+    func, required = _MODES[mode]
+    missing = [key for key in required if key not in params]
+    if missing:
+        raise ValueError(f"{mode} mode requires {_describe_params(required)}")
+    
+    result, time_ms = benchmark(func, *[params[key] for key in required], show_steps)
+    result['benchmark'] = {'time_ms': time_ms}
+    
     # Format with standard structure
     return format_results(
         experiment_id=exp_id,
@@ -31,9 +31,12 @@ from rsa_tool.playground.playground_utils import (
     add_step,
     create_comparison_table
 )
-from Algorithms.utilities import is_probable_prime, generate_prime, modexp
+from Algorithms.utilities import generate_prime, modexp
 import random
 import secrets
+import time
+from functools import lru_cache
+from math import isqrt, ldexp
 
 # ============================================================================
 # LAB METADATA
@@ -141,7 +144,8 @@ def trial_division(n: int, limit: int = 10000) -> tuple[bool, int]:
     
     ops = 1
     i = 3
-    while i * i <= n and i <= limit:
+    bound = min(isqrt(n), limit)  # i*i <= n  <=>  i <= isqrt(n)
+    while i <= bound:
         if n % i == 0:
             return False, ops
         i += 2
@@ -150,11 +154,183 @@ def trial_division(n: int, limit: int = 10000) -> tuple[bool, int]:
     return True, ops
 
 
+# Số nguyên tố lẻ nhỏ dùng để pre-sieve candidate trước Miller-Rabin
+SMALL_PRIMES = [3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47]
+
+# Số offset (kể cả chẵn) duyệt từ mỗi base ngẫu nhiên trong generate_prime_number
+SIEVE_WINDOW = 4096
+
+# Deterministic Miller-Rabin: với n < bound, các base này đủ để kết luận chắc chắn
+_MR_DETERMINISTIC_BASES = [
+    (2047, (2,)),
+    (1373653, (2, 3)),
+    (4759123141, (2, 7, 61)),
+    (3474749660383, (2, 3, 5, 7, 11, 13)),
+    (341550071728321, (2, 3, 5, 7, 11, 13, 17)),
+    (3825123056546413051, (2, 3, 5, 7, 11, 13, 17, 19, 23)),
+    (318665857834031151167461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+    (3317044064679887385961981, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+]
+MR_DETERMINISTIC_LIMIT = _MR_DETERMINISTIC_BASES[-1][0]
+
+
+def _mr_bases(n: int) -> tuple:
+    """Bộ base cố định cho n < MR_DETERMINISTIC_LIMIT"""
+    for bound, bases in _MR_DETERMINISTIC_BASES:
+        if n < bound:
+            return bases
+    raise ValueError(f"n must be < {MR_DETERMINISTIC_LIMIT} for deterministic Miller-Rabin")
+
+
+def deterministic_miller_rabin(n: int) -> bool:
+    """
+    Miller-Rabin với bộ base cố định, không có xác suất sai
+    
+    Chỉ dùng cho n < MR_DETERMINISTIC_LIMIT (~3.3 × 10^24, khoảng 81 bit)
+    """
+    if n < 2:
+        return False
+    bases = _mr_bases(n)
+    for p in _MR_DETERMINISTIC_BASES[-1][1]:
+        if n % p == 0:
+            return n == p
+    
+    r, s = mr_decompose(n)
+    return all(_mr_round(a, n, r, s) for a in bases)
+
+
+def miller_rabin(n: int, rounds: int = 10) -> bool:
+    """
+    Miller-Rabin với `rounds` base ngẫu nhiên trong [2, n-2] (CLRS 31.8)
+    
+    Xác suất sai <= 4^(-rounds). Dùng chung mr_decompose/_mr_round với bản deterministic.
+    """
+    if n in (2, 3):
+        return True
+    if n < 2 or n % 2 == 0:
+        return False
+    r, s = mr_decompose(n)
+    randbelow = secrets.randbelow
+    return all(_mr_round(randbelow(n - 3) + 2, n, r, s) for _ in range(rounds))
+
+
+@lru_cache(maxsize=1024)
+def mr_decompose(n: int) -> tuple[int, int]:
+    """Viết n - 1 = 2^s * r với r lẻ, trả về (r, s) (tính một lần cho mọi round)"""
+    r = n - 1
+    s = (r & -r).bit_length() - 1
+    return r >> s, s
+
+
+def _mr_round(a: int, n: int, r: int, s: int) -> bool:
+    """Một round Miller-Rabin với witness a; True nếu a không chứng minh n là hợp số"""
+    n_minus_1 = n - 1
+    x = pow(a, r, n)
+    if x == 1 or x == n_minus_1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n_minus_1:
+            return True
+    return False
+
+
+def _jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (a/n) với n lẻ dương"""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _strong_lucas(n: int) -> bool:
+    """
+    Strong Lucas probable prime test, tham số Selfridge (method A)
+    
+    n phải lẻ, không phải số chính phương và không chia hết cho số nguyên tố nhỏ.
+    """
+    # D đầu tiên trong 5, -7, 9, -11, ... có (D/n) = -1
+    D = 5
+    while True:
+        j = _jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False  # gcd(D, n) > 1
+        D = -D - 2 if D > 0 else -D + 2
+    P = 1
+    Q = (1 - D) // 4
+    
+    # n + 1 = d * 2^s với d lẻ
+    d = n + 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    
+    # Tính U_d, V_d, Q^d mod n theo binary chain, bắt đầu từ k = 1
+    U, V, Qk = 1, P, Q % n
+    for bit in format(d, 'b')[1:]:
+        # k -> 2k
+        U = U * V % n
+        V = (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if bit == '1':
+            # k -> k + 1 (chia 2 mod n: n lẻ nên cộng n khi lẻ)
+            U, V = P * U + V, D * U + P * V
+            if U & 1:
+                U += n
+            if V & 1:
+                V += n
+            U = (U >> 1) % n
+            V = (V >> 1) % n
+            Qk = Qk * Q % n
+    
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if V == 0:
+            return True
+    return False
+
+
+def is_bpsw_prime(n: int) -> bool:
+    """
+    Baillie-PSW: Miller-Rabin base 2 + strong Lucas test
+    
+    Chỉ 2 phép "modexp" cho mỗi số; chưa có hợp số nào được biết vượt qua
+    BPSW (đã kiểm chứng đầy đủ tới 2^64).
+    """
+    if n < 2:
+        return False
+    for p in (2, *SMALL_PRIMES):
+        if n % p == 0:
+            return n == p
+    
+    r, s = mr_decompose(n)
+    if not _mr_round(2, n, r, s):
+        return False
+    
+    root = isqrt(n)
+    if root * root == n:
+        return False
+    
+    return _strong_lucas(n)
+
+
 def fermat_test(n: int, rounds: int = 10) -> tuple[bool, List[int]]:
     """
     Fermat primality test
     
-    Tests if a^(n-1) ≡ 1 (mod n) for random a
+    Tests if a^(n-1) ≡ 1 (mod n) with a = 2 first, then random a
     
     Returns: (probably_prime, witnesses_tested)
     """
@@ -164,15 +340,27 @@ def fermat_test(n: int, rounds: int = 10) -> tuple[bool, List[int]]:
         return True, []
     if n % 2 == 0:
         return False, []
+    if rounds < 1:
+        return True, []
+    
+    n_minus_1 = n - 1
     
-    import random
-    witnesses = []
+    # Base 2 loại gần như mọi hợp số ngay, không cần sinh số ngẫu nhiên
+    witnesses = [2]
+    if pow(2, n_minus_1, n) != 1:
+        return False, witnesses
     
-    for _ in range(rounds):
-        a = random.randint(2, n - 2)
+    # n = 3 thì chỉ có a = 2; ngược lại a ∈ [2, n-2] từ getrandbits, không qua randint
+    span = max(n - 3, 1)
+    nbits = span.bit_length() + 8  # Thêm bit để giảm modulo bias
+    grb = random.getrandbits
+    _pow = pow
+    
+    for _ in range(rounds - 1):
+        a = grb(nbits) % span + 2
         witnesses.append(a)
         
-        if pow(a, n - 1, n) != 1:
+        if _pow(a, n_minus_1, n) != 1:
             return False, witnesses
     
     return True, witnesses
@@ -182,15 +370,27 @@ def test_primality_multi(n: int, rounds: int = 10) -> Dict[str, Any]:
     """Test primality using multiple algorithms"""
     results = {}
     
-    # Miller-Rabin
-    mr_result, mr_time = benchmark(is_probable_prime, n, rounds)
-    results['miller_rabin'] = {
-        'is_prime': mr_result,
-        'time_ms': mr_time,
-        'rounds': rounds,
-        'error_probability': 0.25 ** rounds,
-        'deterministic': False
-    }
+    # Miller-Rabin (deterministic với n < MR_DETERMINISTIC_LIMIT)
+    if n < MR_DETERMINISTIC_LIMIT:
+        bases = _mr_bases(n)
+        mr_result, mr_time = benchmark(deterministic_miller_rabin, n)
+        results['miller_rabin'] = {
+            'is_prime': mr_result,
+            'time_ms': mr_time,
+            'rounds': len(bases),
+            'bases': list(bases),
+            'error_probability': 0,
+            'deterministic': True
+        }
+    else:
+        mr_result, mr_time = benchmark(miller_rabin, n, rounds)
+        results['miller_rabin'] = {
+            'is_prime': mr_result,
+            'time_ms': mr_time,
+            'rounds': rounds,
+            'error_probability': 0.25 ** rounds,
+            'deterministic': False
+        }
     
     # Fermat test
     fermat_result, fermat_time = benchmark(fermat_test, n, rounds)
@@ -203,8 +403,18 @@ def test_primality_multi(n: int, rounds: int = 10) -> Dict[str, Any]:
     }
     
     # Trial division (for smaller numbers)
-    if n < 10**9:
-        trial_result, trial_time = benchmark(trial_division, n, min(100000, int(n**0.5) + 1))
+    # MR deterministic đã kết luận hợp số -> bỏ qua trial division, giữ kết luận
+    if n < 10**9 and mr_result is False and results['miller_rabin']['deterministic']:
+        results['trial_division'] = {
+            'is_prime': False,
+            'time_ms': 0.0,
+            'operations': 0,
+            'deterministic': True,
+            'early_exit': True
+        }
+    elif n < 10**9:
+        trial_limit = min(100000, isqrt(n) + 1)
+        trial_result, trial_time = benchmark(trial_division, n, trial_limit)
         results['trial_division'] = {
             'is_prime': trial_result[0],
             'time_ms': trial_time,
@@ -215,64 +425,91 @@ def test_primality_multi(n: int, rounds: int = 10) -> Dict[str, Any]:
     return results
 
 
-def generate_prime_number(bits: int, rounds: int = 10) -> Dict[str, Any]:
+def generate_prime_number(bits: int) -> Dict[str, Any]:
     """Generate a random prime number of specified bit length"""
-    import random
-    import time
-    
     steps = create_step_log()
-    add_step(steps, f"Generating {bits}-bit prime number", {'bits': bits, 'rounds': rounds})
+    add_step(steps, f"Generating {bits}-bit prime number", {'bits': bits})
+    
+    # bits <= 81 thì mọi candidate < MR_DETERMINISTIC_LIMIT: test chắc chắn;
+    # lớn hơn thì dùng BPSW thay cho k round Miller-Rabin ngẫu nhiên
+    deterministic = bits <= 81
+    algorithm = 'Deterministic Miller-Rabin' if deterministic else 'BPSW'
     
     attempts = 0
+    mr_tests = 0
     start_time = time.perf_counter()
+    lo = 1 << (bits - 1)
+    hi = lo << 1
     
     while True:
-        attempts += 1
-        
-        # Generate random odd number
-        candidate = random.randrange(2**(bits-1), 2**bits)
-        if candidate % 2 == 0:
-            candidate += 1
+        # Một lần random cho cả window: base lẻ với bit cao nhất được set
+        base = random.getrandbits(bits) | lo | 1
+        residues = [base % p for p in SMALL_PRIMES]
         
-        add_step(steps, f"Attempt {attempts}: Testing {candidate}", {'candidate': candidate})
-        
-        # Test with Miller-Rabin
-        if is_probable_prime(candidate, rounds):
-            end_time = time.perf_counter()
-            time_ms = (end_time - start_time) * 1000
+        # Đi tiếp base, base+2, ... trong window; offset nào chia hết cho
+        # một số nguyên tố nhỏ thì bỏ qua, chỉ chạy MR trên phần còn lại
+        # (bits >= 8 nên candidate > 47, không thể trùng với chính SMALL_PRIMES)
+        for delta in range(0, SIEVE_WINDOW, 2):
+            candidate = base + delta
+            if candidate >= hi:
+                break  # Vượt quá bits: random lại base
+            attempts += 1
             
-            add_step(steps, f"Found prime after {attempts} attempts", {
-                'prime': candidate,
-                'attempts': attempts,
-                'time_ms': time_ms
-            })
+            if not all((r + delta) % p for r, p in zip(residues, SMALL_PRIMES)):
+                continue
             
-            return {
-                'prime': candidate,
-                'bits': bits,
-                'attempts': attempts,
-                'time_ms': time_ms,
-                'rounds': rounds,
-                'error_probability': 0.25 ** rounds,
-                'steps': steps
-            }
-        
-        if attempts > 1000:
-            raise RuntimeError(f"Failed to generate prime after {attempts} attempts")
+            if mr_tests >= 1000:
+                raise RuntimeError(f"Failed to generate prime after {mr_tests} Miller-Rabin tests")
+            mr_tests += 1
+            
+            add_step(steps, f"Attempt {attempts}: Testing {candidate}", {'candidate': candidate})
+            
+            if deterministic:
+                is_prime = deterministic_miller_rabin(candidate)
+            else:
+                is_prime = is_bpsw_prime(candidate)
+            
+            if is_prime:
+                end_time = time.perf_counter()
+                time_ms = (end_time - start_time) * 1000
+                
+                add_step(steps, f"Found prime after {attempts} attempts", {
+                    'prime': candidate,
+                    'attempts': attempts,
+                    'mr_tests': mr_tests,
+                    'time_ms': time_ms
+                })
+                
+                # Số round thực sự chạy trên prime tìm được: bộ base cố định,
+                # hoặc BPSW = 1 round MR base 2 + strong Lucas
+                bases = _mr_bases(candidate) if deterministic else (2,)
+                return {
+                    'prime': candidate,
+                    'bits': bits,
+                    'attempts': attempts,
+                    'mr_tests': mr_tests,
+                    'time_ms': time_ms,
+                    'algorithm': algorithm,
+                    'rounds': len(bases),
+                    'bases': list(bases),
+                    'lucas_test': not deterministic,
+                    # BPSW: không có bound xác suất, nhưng chưa biết pseudoprime nào
+                    'error_probability': 0 if deterministic else None,
+                    'deterministic': deterministic,
+                    'steps': steps
+                }
 
 
 def probability_analysis(rounds_range: range = range(1, 21)) -> Dict[str, Any]:
     """Analyze error probabilities for different round counts"""
     analysis = []
-    
     for rounds in rounds_range:
-        error_prob = 0.25 ** rounds
-        success_prob = 1 - error_prob
-        
+        # 0.25^rounds = 2^(-2·rounds): ldexp dựng trực tiếp exponent, không cần pow
+        error_prob = ldexp(1.0, -2 * rounds)
         analysis.append({
             'rounds': rounds,
             'error_probability': error_prob,
-            'success_probability': success_prob,
+            'success_probability': 1 - error_prob,
             'error_percent': error_prob * 100,
             'bits_certainty': -rounds * 2  # log2(0.25) = -2
         })
@@ -305,7 +542,7 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
             raise ValueError("test_prime mode requires 'n' parameter")
         
         n = params['n']
-        result, time_ms = benchmark(is_probable_prime, n, rounds)
+        result, time_ms = benchmark(miller_rabin, n, rounds)
         
         results = {
             'n': n,
@@ -347,7 +584,7 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         
     elif mode == 'generate_prime':
         bits = params.get('bits', 512)
-        result, time_ms = benchmark(generate_prime_number, bits, rounds)
+        result, time_ms = benchmark(generate_prime_number, bits)
         result['benchmark'] = {'time_ms': time_ms}
         results = result
         
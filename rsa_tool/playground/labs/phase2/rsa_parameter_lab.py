@@ -14,9 +14,12 @@ CLRS Sections:
 - 31.7: RSA public-key cryptosystem
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import sys
 import os
+import math
+import random
+from bisect import bisect_right
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
@@ -29,7 +32,6 @@ from rsa_tool.playground.playground_utils import (
     add_step
 )
 from Algorithms.rsa import keygen, RSA
-from Algorithms.utilities import extended_gcd
 
 # ============================================================================
 # LAB METADATA
@@ -120,6 +122,15 @@ EXAMPLES = [
 # SECURITY ANALYSIS FUNCTIONS
 # ============================================================================
 
+# NIST key size recommendations, khoá sắp xếp tăng dần cho bisect
+_NIST_TABLE = {
+    1024: {'security_bits': 80, 'valid_until': 2010, 'status': 'DEPRECATED'},
+    2048: {'security_bits': 112, 'valid_until': 2030, 'status': 'ACCEPTABLE'},
+    3072: {'security_bits': 128, 'valid_until': 2050, 'status': 'GOOD'},
+    4096: {'security_bits': 152, 'valid_until': 2100, 'status': 'EXCELLENT'}
+}
+_NIST_KEYS = tuple(sorted(_NIST_TABLE))
+
 def analyze_security(n, e, d, p, q, phi_n) -> Dict[str, Any]:
     """Comprehensive security analysis of RSA parameters"""
     
@@ -153,15 +164,15 @@ def analyze_security(n, e, d, p, q, phi_n) -> Dict[str, Any]:
     # Check 2: p-q distance (Fermat factorization)
     p_q_diff = abs(p - q)
     p_q_ratio = max(p, q) / min(p, q)
-    sqrt_n = int(n ** 0.5)
+    sqrt_n = math.isqrt(n)
     
     analysis['p_q_distance'] = {
         'p_q_diff': p_q_diff,
         'p_q_ratio': p_q_ratio,
-        'safe': p_q_diff > sqrt_n / 1000
+        'safe': p_q_diff * 1000 > sqrt_n
     }
     
-    if p_q_diff < sqrt_n / 100:
+    if p_q_diff * 100 < sqrt_n:
         analysis['vulnerabilities'].append({
             'type': 'Fermat Factorization',
             'severity': 'HIGH',
@@ -186,7 +197,7 @@ def analyze_security(n, e, d, p, q, phi_n) -> Dict[str, Any]:
         })
     
     # Check 4: gcd(e, phi(n))
-    gcd_val, _, _ = extended_gcd(e, phi_n)
+    gcd_val = math.gcd(e, phi_n)
     analysis['e_phi_coprime'] = {
         'gcd': gcd_val,
         'coprime': gcd_val == 1
@@ -200,18 +211,9 @@ def analyze_security(n, e, d, p, q, phi_n) -> Dict[str, Any]:
             'mitigation': 'Regenerate with coprime e'
         })
     
-    # Check 5: Key size vs NIST recommendations
-    nist_recommendations = {
-        1024: {'security_bits': 80, 'valid_until': 2010, 'status': 'DEPRECATED'},
-        2048: {'security_bits': 112, 'valid_until': 2030, 'status': 'ACCEPTABLE'},
-        3072: {'security_bits': 128, 'valid_until': 2050, 'status': 'GOOD'},
-        4096: {'security_bits': 152, 'valid_until': 2100, 'status': 'EXCELLENT'}
-    }
-    
-    nist_level = None
-    for key_size in sorted(nist_recommendations.keys()):
-        if n_bits >= key_size:
-            nist_level = nist_recommendations[key_size]
+    # Check 5: Key size vs NIST recommendations (key size lớn nhất <= n_bits)
+    idx = bisect_right(_NIST_KEYS, n_bits) - 1
+    nist_level = _NIST_TABLE[_NIST_KEYS[idx]] if idx >= 0 else None
     
     analysis['nist_compliance'] = {
         'key_size': n_bits,
@@ -240,8 +242,6 @@ def analyze_security(n, e, d, p, q, phi_n) -> Dict[str, Any]:
 def benchmark_performance(pub, priv) -> Dict[str, Any]:
     """Benchmark RSA encryption/decryption performance"""
     
-    import random
-    
     rsa = RSA(pub, priv)
     
     # Generate random message
@@ -282,6 +282,29 @@ def benchmark_performance(pub, priv) -> Dict[str, Any]:
     return results
 
 
+# Khóa đã sinh theo (bits, e), dùng lại giữa các lần run(); đầy thì bỏ khóa cũ nhất
+KEYGEN_CACHE_SIZE = 8
+_keygen_cache: Dict[Tuple[int, int], Tuple[Any, Any]] = {}
+
+
+def _cached_keygen(bits: int, e: int):
+    """
+    Sinh khóa một lần cho mỗi (bits, e) và dùng lại giữa các lần run()
+    
+    Returns: (pub, priv, keygen_time_ms, cached); cache hit thì keygen_time_ms = None
+    vì thời gian sinh khóa thuộc về lần run() trước
+    """
+    keys = _keygen_cache.get((bits, e))
+    if keys is not None:
+        return keys[0], keys[1], None, True
+    
+    (pub, priv), keygen_time = benchmark(keygen, bits, e)
+    if len(_keygen_cache) >= KEYGEN_CACHE_SIZE:
+        _keygen_cache.pop(next(iter(_keygen_cache)), None)
+    _keygen_cache[(bits, e)] = (pub, priv)
+    return pub, priv, keygen_time, False
+
+
 # ============================================================================
 # MAIN ENTRY POINT
 # ============================================================================
@@ -302,21 +325,26 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
     # Generate experiment ID
     exp_id = create_experiment_id()
     
-    # Generate RSA keys
-    print(f"Generating {bits}-bit RSA keys with e={e}...")
-    pub, priv = keygen(bits, e)
-    keys = {
-        'public_key': {'e': pub.e, 'n': pub.n},
-        'private_key': {'d': priv.d, 'n': priv.n, 'p': priv.p, 'q': priv.q}
-    }
-    keys_tuple, keygen_time = (pub, priv), 0  # Mock timing for now
-    
-    # Extract parameters
-    n = pub.n
-    d = priv.d
-    p = priv.p
-    q = priv.q
-    phi_n = (p - 1) * (q - 1)
+    # Generate RSA keys (parameter_sweep tự sinh khóa cho từng e)
+    if mode != 'parameter_sweep':
+        print(f"Generating {bits}-bit RSA keys with e={e}...")
+        if mode == 'generate_analyze':
+            # Mode này để xem khóa mới: luôn sinh lại, không dùng cache
+            (pub, priv), keygen_time = benchmark(keygen, bits, e)
+            keygen_cached = False
+        else:
+            pub, priv, keygen_time, keygen_cached = _cached_keygen(bits, e)
+        keys = {
+            'public_key': {'e': pub.e, 'n': pub.n},
+            'private_key': {'d': priv.d, 'n': priv.n, 'p': priv.p, 'q': priv.q}
+        }
+        
+        # Extract parameters
+        n = pub.n
+        d = priv.d
+        p = priv.p
+        q = priv.q
+        phi_n = (p - 1) * (q - 1)
     
     # Execute based on mode
     if mode == 'generate_analyze':
@@ -343,7 +371,8 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         results = {
             'key_size': bits,
             'performance': performance,
-            'keygen_time_ms': keygen_time
+            'keygen_time_ms': keygen_time,
+            'keygen_cached': keygen_cached
         }
         
     elif mode == 'parameter_sweep':
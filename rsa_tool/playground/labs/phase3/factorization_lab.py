@@ -19,6 +19,7 @@ import os
 import random
 import time
 import math
+from itertools import cycle
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')))
@@ -33,7 +34,7 @@ from rsa_tool.playground.playground_utils import (
     create_comparison_table
 )
 from Algorithms.pollard_rho import pollard_rho
-from Algorithms.utilities import gcd
+from Algorithms.utilities import generate_prime, is_probable_prime
 
 # ============================================================================
 # LAB METADATA
@@ -131,10 +132,13 @@ def trial_division(n: int, limit: Optional[int] = None) -> Tuple[List[int], int]
     """
     Trial division factorization
     
+    Dùng wheel 2·3·5·7: sau khi chia hết 2, 3, 5, 7 chỉ thử các d nguyên tố
+    cùng nhau với 210 (48/210 ≈ 23% số nguyên, thay vì 50% số lẻ).
+    
     Returns: (factors, iterations)
     """
     if limit is None:
-        limit = min(int(n**0.5) + 1, 10**6)
+        limit = min(math.isqrt(n) + 1, 10**6)
     
     factors = []
     iterations = 0
@@ -145,14 +149,29 @@ def trial_division(n: int, limit: Optional[int] = None) -> Tuple[List[int], int]
         n //= 2
         iterations += 1
     
-    # Try odd divisors
-    d = 3
-    while d * d <= n and d <= limit:
+    # Các số nguyên tố của wheel
+    for d in (3, 5, 7):
+        if d > limit:
+            break
         while n % d == 0:
             factors.append(d)
             n //= d
             iterations += 1
-        d += 2
+        iterations += 1
+    
+    # Try wheel divisors: d*d <= n  <=>  d <= isqrt(n), chỉ tính lại khi n đổi
+    d = 11
+    bound = min(math.isqrt(n), limit)
+    for gap in cycle(_WHEEL_GAPS):
+        if d > bound:
+            break
+        if n % d == 0:
+            while n % d == 0:
+                factors.append(d)
+                n //= d
+                iterations += 1
+            bound = min(math.isqrt(n), limit)
+        d += gap
         iterations += 1
         
         if iterations > limit:
@@ -164,6 +183,31 @@ def trial_division(n: int, limit: Optional[int] = None) -> Tuple[List[int], int]
     return factors, iterations
 
 
+# Khoảng cách giữa các số nguyên tố cùng nhau với 210 = 2·3·5·7, bắt đầu từ 11
+_WHEEL_GAPS = (2, 4, 2, 4, 6, 2, 6, 4, 2, 4, 6, 6, 2, 6, 4, 2, 6, 4, 6, 8, 4, 2, 4, 2,
+               4, 8, 6, 4, 6, 2, 4, 6, 2, 6, 6, 4, 2, 4, 6, 2, 6, 4, 2, 4, 2, 10, 2, 10)
+
+# Số bước Pollard Rho gộp chung một lần gcd
+RHO_BATCH = 128
+
+
+def _square_table(m: int) -> bytes:
+    """table[r] = 1 nếu r là số chính phương mod m"""
+    table = bytearray(m)
+    for x in range(m):
+        table[x * x % m] = 1
+    return bytes(table)
+
+
+# Số chính phương mod 64 chỉ có 12/64 giá trị: gói thành bitmask 64 bit
+# (bit r bật <=> r là số chính phương mod 64); mod 63, 65, 11 lọc tiếp
+# (dùng chung một phép mod 63*65*11 = 45045 trên bignum)
+_SQUARE_MASK_64 = sum(1 << r for r in {x * x & 63 for x in range(32)})
+_SQUARE_MOD_63 = _square_table(63)
+_SQUARE_MOD_65 = _square_table(65)
+_SQUARE_MOD_11 = _square_table(11)
+
+
 def fermat_factorization(n: int, max_iterations: int = 100000) -> Tuple[Optional[Tuple[int, int]], int]:
     """
     Fermat's factorization method
@@ -174,46 +218,88 @@ def fermat_factorization(n: int, max_iterations: int = 100000) -> Tuple[Optional
     if n % 2 == 0:
         return ((2, n // 2), 1)
     
-    a = math.isqrt(n) + 1
-    iterations = 0
-    
-    for _ in range(max_iterations):
-        b2 = a * a - n
-        iterations += 1
-        
-        if b2 >= 0:
-            b = math.isqrt(b2)
-            if b * b == b2:
-                p = a - b
-                q = a + b
-                if p * q == n and p > 1 and q > 1:
-                    return ((p, q), iterations)
+    # a = ceil(sqrt(n)): n chính phương (p = q) thì ra ngay với b = 0
+    a = math.isqrt(n)
+    if a * a < n:
+        a += 1
+    b2 = a * a - n  # Luôn >= 0 vì a >= sqrt(n)
+    step = 2 * a + 1  # (a+1)^2 - a^2, tăng 2 mỗi vòng
+    
+    for iterations in range(1, max_iterations + 1):
+        # Lọc nhanh trước khi gọi isqrt: chỉ < 1% b2 qua được cả bốn bảng
+        if _SQUARE_MASK_64 >> (b2 & 63) & 1:
+            r = b2 % 45045
+            if _SQUARE_MOD_63[r % 63] and _SQUARE_MOD_65[r % 65] and _SQUARE_MOD_11[r % 11]:
+                b = math.isqrt(b2)
+                if b * b == b2:
+                    p = a - b
+                    q = a + b
+                    if p > 1 and q > 1:  # p*q = a^2 - b^2 = n
+                        return ((p, q), iterations)
         
+        # (a+1)^2 - n = b2 + 2a + 1
+        b2 += step
+        step += 2
         a += 1
     
-    return (None, iterations)
+    return (None, max_iterations)
 
 
 def pollard_rho_wrapper(n: int, max_iterations: int = 100000) -> Tuple[Optional[int], int]:
     """
     Wrapper for Pollard's Rho with iteration counting
     
-    Returns: (factor, iterations)
+    Dùng Brent's cycle detection và gộp gcd: nhân dồn |x - y| mod n trong
+    RHO_BATCH bước rồi mới gọi gcd một lần. Nếu batch "nhảy qua" factor
+    (gcd = n) thì backtrack từng bước; nếu vẫn ra n thì đổi hằng số c.
+    
+    Returns: (factor, iterations) với iterations = số lần tính f(x)
     """
-    iterations = 0
-    x, y, d = 2, 2, 1
+    if n % 2 == 0:
+        return (2, 1) if n > 2 else (None, 0)
     
-    def f(x):
-        return (x * x + 1) % n
+    # Floyd cũ tính f 3 lần mỗi iteration: giữ nguyên lượng công việc tối đa
+    budget = 3 * max_iterations
+    iterations = 0
+    c = 1
     
-    while d == 1 and iterations < max_iterations:
-        x = f(x)
-        y = f(f(y))
-        d = gcd(abs(x - y), n)
-        iterations += 1
+    while iterations < budget:
+        y, r, q, g = 2, 1, 1, 1
+        x = ys = y
+        
+        while g == 1 and iterations < budget:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            iterations += r
+            
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                steps = min(RHO_BATCH, r - k)
+                for _ in range(steps):
+                    y = (y * y + c) % n
+                    q = q * (x - y) % n  # % n luôn trả về >= 0, không cần abs
+                iterations += steps
+                g = math.gcd(q, n)
+                k += steps
+            r *= 2
+        
+        if g == n:
+            # Backtrack từ đầu batch cuối để tìm đúng bước gcd > 1
+            while True:
+                ys = (ys * ys + c) % n
+                iterations += 1
+                g = math.gcd(x - ys, n)
+                if g > 1:
+                    break
+        
+        if 1 < g < n:
+            return (g, iterations)
+        if g == 1:
+            break  # Hết budget
+        c += 1  # Chu trình không tách được n: thử f(x) = x^2 + c khác
     
-    if d != 1 and d != n:
-        return (d, iterations)
     return (None, iterations)
 
 
@@ -227,21 +313,18 @@ def generate_composite(bits: int, p_q_ratio: float = 1.5) -> Tuple[int, int, int
     
     Returns: (n, p, q)
     """
-    from Algorithms.utilities import generate_prime
-    
     # Generate p
     p_bits = bits // 2
     p = generate_prime(p_bits)
     
     # Generate q based on ratio
     if p_q_ratio < 1.5:
-        # Close primes (vulnerable to Fermat)
-        q_bits = p_bits
-        while True:
-            q = generate_prime(q_bits)
-            actual_ratio = max(p, q) / min(p, q)
-            if abs(actual_ratio - p_q_ratio) < 0.2:
-                break
+        # Close primes (vulnerable to Fermat): q = số nguyên tố kế tiếp sau p * ratio,
+        # không random lại cả số nguyên tố cho tới khi ratio "trúng"
+        scale = 1 << 32  # Nhân ratio bằng số nguyên, không đưa p (bignum) qua float
+        q = (p * round(p_q_ratio * scale) // scale) | 1
+        while q == p or not is_probable_prime(q):
+            q += 2
     else:
         # Well-separated primes
         q_bits = bits - p_bits
@@ -254,6 +337,38 @@ def generate_composite(bits: int, p_q_ratio: float = 1.5) -> Tuple[int, int, int
 # ANALYSIS FUNCTIONS
 # ============================================================================
 
+# Factor nhỏ hơn ngưỡng này thì trial division tìm ra gần như tức thì
+SMALL_FACTOR_LIMIT = 1 << 20
+
+# Smoothness bound B cho kiểm tra Pollard p-1
+P_MINUS_1_BOUND = 10000
+
+
+def _primes_up_to(limit: int) -> Tuple[int, ...]:
+    """Sàng Eratosthenes: mọi số nguyên tố <= limit"""
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[0:2] = b'\x00\x00'
+    for i in range(2, math.isqrt(limit) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit + 1, i)))
+    return tuple(i for i in range(limit + 1) if sieve[i])
+
+
+_SMALL_PRIMES = _primes_up_to(P_MINUS_1_BOUND)
+
+
+def _is_smooth(m: int) -> bool:
+    """True nếu mọi thừa số nguyên tố của m đều <= P_MINUS_1_BOUND"""
+    for prime in _SMALL_PRIMES:
+        if m % prime == 0:
+            m //= prime
+            while m % prime == 0:
+                m //= prime
+            if m == 1:
+                return True
+    return m == 1
+
+
 def analyze_factorization_difficulty(n: int, p: int, q: int) -> Dict[str, Any]:
     """Analyze why a number is easy/hard to factor"""
     
@@ -267,16 +382,16 @@ def analyze_factorization_difficulty(n: int, p: int, q: int) -> Dict[str, Any]:
     
     # Check p-q distance
     p_q_diff = abs(p - q)
-    sqrt_n = int(n ** 0.5)
+    sqrt_n = math.isqrt(n)
     p_q_ratio = max(p, q) / min(p, q)
     
     analysis['p_q_distance'] = {
         'diff': p_q_diff,
         'ratio': p_q_ratio,
-        'fermat_vulnerable': p_q_diff < sqrt_n / 100
+        'fermat_vulnerable': p_q_diff * 100 < sqrt_n
     }
     
-    if p_q_diff < sqrt_n / 100:
+    if p_q_diff * 100 < sqrt_n:
         analysis['vulnerabilities'].append({
             'type': 'Fermat Factorization',
             'severity': 'HIGH',
@@ -285,12 +400,14 @@ def analyze_factorization_difficulty(n: int, p: int, q: int) -> Dict[str, Any]:
         })
     
     # Check small factors
+    p_small = p < SMALL_FACTOR_LIMIT
+    q_small = q < SMALL_FACTOR_LIMIT
     analysis['small_factors'] = {
-        'p_small': p < 2**20,
-        'q_small': q < 2**20
+        'p_small': p_small,
+        'q_small': q_small
     }
     
-    if p < 2**20 or q < 2**20:
+    if p_small or q_small:
         analysis['vulnerabilities'].append({
             'type': 'Trial Division',
             'severity': 'CRITICAL',
@@ -298,6 +415,24 @@ def analyze_factorization_difficulty(n: int, p: int, q: int) -> Dict[str, Any]:
             'estimated_time': 'milliseconds'
         })
     
+    # Check Pollard p-1: chỉ cần p-1 hoặc q-1 là B-smooth là tách được n
+    p_minus_1_smooth = _is_smooth(p - 1)
+    q_minus_1_smooth = _is_smooth(q - 1)
+    analysis['pollard_p_minus_1'] = {
+        'bound': P_MINUS_1_BOUND,
+        'p_minus_1_smooth': p_minus_1_smooth,
+        'q_minus_1_smooth': q_minus_1_smooth,
+        'vulnerable': p_minus_1_smooth or q_minus_1_smooth
+    }
+    
+    if p_minus_1_smooth or q_minus_1_smooth:
+        analysis['vulnerabilities'].append({
+            'type': 'Pollard p-1',
+            'severity': 'HIGH',
+            'description': f'p-1 or q-1 has no prime factor above {P_MINUS_1_BOUND}',
+            'estimated_time': 'seconds'
+        })
+    
     # Check size balance
     p_bits = p.bit_length()
     q_bits = q.bit_length()
@@ -345,32 +480,43 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         
         n = params['n']
         
-        # Try Pollard Rho first
-        print(f"Factoring {n} using Pollard's Rho...")
-        factor, iterations = pollard_rho_wrapper(n)
-        
-        if factor:
-            # Found one factor, compute the other
-            other = n // factor
-            factors = sorted([factor, other])
-            
-            results = {
-                'n': n,
-                'factors': factors,
-                'algorithm': 'Pollard Rho',
-                'iterations': iterations,
-                'success': True,
-                'verification': factors[0] * factors[1] == n
-            }
-        else:
+        # n nguyên tố thì Rho chỉ chạy hết budget rồi thất bại: kiểm tra Miller-Rabin trước
+        if is_probable_prime(n):
             results = {
                 'n': n,
                 'factors': [],
-                'algorithm': 'Pollard Rho',
-                'iterations': iterations,
+                'algorithm': 'Miller-Rabin',
+                'iterations': 0,
                 'success': False,
-                'message': 'Factorization failed (number may be prime or too large)'
+                'message': 'n is prime'
             }
+        else:
+            # Try Pollard Rho first
+            print(f"Factoring {n} using Pollard's Rho...")
+            factor, iterations = pollard_rho_wrapper(n)
+            
+            if factor:
+                # Found one factor, compute the other
+                other = n // factor
+                factors = [factor, other] if factor <= other else [other, factor]
+            
+                results = {
+                    'n': n,
+                    'factors': factors,
+                    'algorithm': 'Pollard Rho',
+                    'iterations': iterations,
+                    'success': True,
+                    'verification': factors[0] * factors[1] == n
+                }
+            else:
+                results = {
+                    'n': n,
+                    'factors': [],
+                    'algorithm': 'Pollard Rho',
+                    'iterations': iterations,
+                    'success': False,
+                    'message': 'Factorization failed (n too large for the iteration budget)'
+                }
     
     elif mode == 'compare_algorithms':
         bits = params.get('bits', 64)
@@ -385,7 +531,7 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         
         # Trial Division
         print("Testing Trial Division...")
-        factors_td, time_td = benchmark(trial_division, n, min(10**6, int(n**0.5)))
+        factors_td, time_td = benchmark(trial_division, n, min(10**6, math.isqrt(n)))
         comparison['trial_division'] = {
             'factors': factors_td[0],
             'iterations': factors_td[1],
@@ -397,9 +543,8 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         print("Testing Fermat Factorization...")
         result_fermat, time_fermat = benchmark(fermat_factorization, n, 100000)
         if result_fermat[0]:
-            factors_fermat = list(result_fermat[0])
             comparison['fermat'] = {
-                'factors': sorted(factors_fermat),
+                'factors': list(result_fermat[0]),  # Fermat trả về (a - b, a + b): đã tăng dần
                 'iterations': result_fermat[1],
                 'time_ms': time_fermat,
                 'success': True
@@ -419,7 +564,7 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
             f1 = result_rho[0]
             f2 = n // f1
             comparison['pollard_rho'] = {
-                'factors': sorted([f1, f2]),
+                'factors': [f1, f2] if f1 <= f2 else [f2, f1],
                 'iterations': result_rho[1],
                 'time_ms': time_rho,
                 'success': True
@@ -465,7 +610,11 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
             result, time_taken = benchmark(pollard_rho_wrapper, n, 100000)
             method = 'Pollard Rho'
             success = result[0] is not None
-            factors = [result[0], n // result[0]] if success else []
+            if success:
+                f1, f2 = result[0], n // result[0]
+                factors = [f1, f2] if f1 <= f2 else [f2, f1]
+            else:
+                factors = []
         
         results = {
             'n': n,
@@ -476,7 +625,7 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
             'attack': {
                 'method': method,
                 'success': success,
-                'factors_found': sorted(factors) if factors else [],
+                'factors_found': factors,  # Đã sắp tăng dần ở trên
                 'time_ms': time_taken,
                 'iterations': result[1]
             }
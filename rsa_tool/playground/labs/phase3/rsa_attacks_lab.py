@@ -13,10 +13,11 @@ Features:
 Based on: CLRS 31.7, real-world RSA vulnerabilities
 """
 
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, Iterator, List, Tuple, Optional
 import sys
 import os
 import math
+import random
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')))
@@ -30,7 +31,7 @@ from rsa_tool.playground.playground_utils import (
     add_step
 )
 from Algorithms.rsa import keygen, RSA
-from Algorithms.utilities import extended_gcd, gcd
+from Algorithms.utilities import extended_gcd, generate_prime
 
 # ============================================================================
 # LAB METADATA
@@ -83,8 +84,10 @@ PARAMETERS = {
     'e': {
         'type': int,
         'required': False,
+        'min': 3,
+        'max': 17,
         'default': 3,
-        'description': 'Public exponent (for relevant attacks)'
+        'description': 'Public exponent (for relevant attacks, odd; broadcast needs e recipients)'
     },
     'message': {
         'type': int,
@@ -123,38 +126,28 @@ EXAMPLES = [
 # WIENER'S ATTACK
 # ============================================================================
 
-def continued_fraction(n: int, e: int) -> List[Tuple[int, int]]:
+def continued_fraction(n: int, e: int) -> Iterator[Tuple[int, int]]:
     """
     Compute continued fraction convergents of e/n
     
-    Returns: List of (k, d) candidates
+    Generator: convergent k/d được sinh dần, khai triển tới đâu yield tới đó
+    
+    Yields: (k, d) candidates (tử số k, mẫu số d), d tăng dần
     """
-    convergents = []
+    # h/k: tử số / mẫu số của convergent hiện tại (h_-1 = 1, k_-1 = 0)
+    h_prev, h_curr = 0, 1
+    k_prev, k_curr = 1, 0
     
-    # Compute continued fraction expansion
-    cf = []
+    # Khai triển tới hết; caller dừng sớm theo mẫu số (divmod: một phép chia bignum mỗi bước)
     a, b = e, n
     while b:
-        q = a // b
-        cf.append(q)
-        a, b = b, a - q * b
-    
-    # Compute convergents
-    h_prev, k_prev = 1, 0
-    h_curr, k_curr = cf[0], 1
-    
-    convergents.append((k_curr, h_curr))
-    
-    for i in range(1, min(len(cf), 100)):  # Limit iterations
-        h_next = cf[i] * h_curr + h_prev
-        k_next = cf[i] * k_curr + k_prev
+        q, r = divmod(a, b)
+        a, b = b, r
         
-        convergents.append((k_next, h_next))
+        h_prev, h_curr = h_curr, q * h_curr + h_prev
+        k_prev, k_curr = k_curr, q * k_curr + k_prev
         
-        h_prev, k_prev = h_curr, k_curr
-        h_curr, k_curr = h_next, k_next
-    
-    return convergents
+        yield (h_curr, k_curr)
 
 
 def wiener_attack(n: int, e: int) -> Optional[int]:
@@ -165,9 +158,12 @@ def wiener_attack(n: int, e: int) -> Optional[int]:
     
     Returns: private exponent d if found, None otherwise
     """
-    convergents = continued_fraction(n, e)
+    # Wiener chỉ đảm bảo với d < n^(1/4) / 3: mẫu số tăng dần nên vượt ngưỡng là dừng
+    bound_bits = (n.bit_length() + 3) // 4
     
-    for k, d in convergents:
+    for k, d in continued_fraction(n, e):
+        if d.bit_length() > bound_bits:
+            break
         if k == 0 or d == 0:
             continue
         
@@ -189,7 +185,7 @@ def wiener_attack(n: int, e: int) -> Optional[int]:
         if discriminant < 0:
             continue
         
-        sqrt_disc = int(discriminant ** 0.5)
+        sqrt_disc = math.isqrt(discriminant)
         if sqrt_disc * sqrt_disc != discriminant:
             continue
         
@@ -227,14 +223,7 @@ def common_modulus_attack(n: int, e1: int, e2: int, c1: int, c2: int) -> Optiona
         return None  # Attack doesn't work if e1, e2 not coprime
     
     # Compute m = c1^a * c2^b mod n
-    # Handle negative exponents
-    if a < 0:
-        c1 = pow(c1, -1, n)
-        a = -a
-    if b < 0:
-        c2 = pow(c2, -1, n)
-        b = -b
-    
+    # pow với số mũ âm tự lấy nghịch đảo modulo (một trong a, b luôn âm)
     m = (pow(c1, a, n) * pow(c2, b, n)) % n
     
     return m
@@ -244,29 +233,53 @@ def common_modulus_attack(n: int, e1: int, e2: int, c1: int, c2: int) -> Optiona
 # BROADCAST ATTACK
 # ============================================================================
 
+# Số lần keygen tối đa cho mỗi recipient cần sinh (e=3 chỉ ~1/4 cặp (p, q) dùng được e)
+BROADCAST_KEYGEN_RETRIES = 64
+
 def chinese_remainder_theorem(residues: List[int], moduli: List[int]) -> int:
     """
     Solve system of congruences using CRT
     
     x == a_i (mod n_i) for all i
+    
+    Garner: ghép dần từng modulus, chỉ tính nghịch đảo mod n_i
+    thay vì chia tích N (rất lớn) cho từng n_i.
     """
     if len(residues) != len(moduli):
         raise ValueError("Residues and moduli must have same length")
+    if not moduli:
+        return 0
     
-    # Compute N = product of all moduli
-    N = 1
-    for n in moduli:
-        N *= n
+    x = residues[0] % moduli[0]
+    M = moduli[0]
+    for a_i, n_i in zip(residues[1:], moduli[1:]):
+        # x + t*M == a_i (mod n_i)  =>  t = (a_i - x) * M^-1 mod n_i
+        t = (a_i - x) * pow(M, -1, n_i) % n_i
+        x += t * M
+        M *= n_i
     
-    result = 0
-    for a_i, n_i in zip(residues, moduli):
-        N_i = N // n_i
-        # Find M_i such that N_i * M_i == 1 (mod n_i)
-        _, M_i, _ = extended_gcd(N_i, n_i)
-        M_i = M_i % n_i
-        result += a_i * N_i * M_i
+    return x
+
+
+def integer_root(x: int, k: int) -> Tuple[int, bool]:
+    """
+    Căn bậc k nguyên: trả về (floor(x^(1/k)), exact)
     
-    return result % N
+    Newton hoàn toàn trên số nguyên, không qua float nên đúng với mọi kích thước x.
+    """
+    if x < 0 or k < 1:
+        raise ValueError("integer_root requires x >= 0 and k >= 1")
+    if x < 2:
+        return x, True
+    
+    # Giá trị đầu 2^ceil(bits/k) >= căn thật, Newton giảm dần tới floor
+    r = 1 << -(-x.bit_length() // k)
+    while True:
+        y = ((k - 1) * r + x // r ** (k - 1)) // k
+        if y >= r:
+            break
+        r = y
+    return r, r ** k == x
 
 
 def broadcast_attack(ciphertexts: List[int], moduli: List[int], e: int) -> Optional[int]:
@@ -291,20 +304,10 @@ def broadcast_attack(ciphertexts: List[int], moduli: List[int], e: int) -> Optio
     # Apply CRT to get m^e mod (n1*n2*...*ne)
     m_e = chinese_remainder_theorem(c_list, n_list)
     
-    # Take e-th root (works because m^e < n1*n2*...*ne for typical parameters)
-    m = int(m_e ** (1.0 / e) + 0.5)
-    
-    # Verify
-    if pow(m, e, n_list[0]) == c_list[0]:
-        return m
-    
-    # Try nearby values
-    for delta in range(-10, 10):
-        m_candidate = m + delta
-        if m_candidate > 0 and pow(m_candidate, e, n_list[0]) == c_list[0]:
-            return m_candidate
+    # Take exact integer e-th root (works because m^e < n1*n2*...*ne for typical parameters)
+    m, exact = integer_root(m_e, e)
     
-    return None
+    return m if exact else None
 
 
 # ============================================================================
@@ -328,8 +331,6 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         
         # Generate key with conditions that make d small
         # Use large e to force small d
-        from Algorithms.utilities import generate_prime
-        
         p = generate_prime(bits // 2)
         q = generate_prime(bits // 2)
         n = p * q
@@ -337,7 +338,7 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         
         # Choose e close to phi to get small d
         e = phi - 12345  # Arbitrary offset
-        while gcd(e, phi) != 1:
+        while math.gcd(e, phi) != 1:
             e -= 1
         
         d = pow(e, -1, phi)
@@ -345,7 +346,8 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         print(f"Generated key: n={n.bit_length()} bits, d={d.bit_length()} bits")
         
         # Check Wiener threshold
-        wiener_threshold = n ** 0.25 / 3
+        # Số nguyên hoàn toàn: n ** 0.25 qua float sẽ OverflowError với n 2048 bit
+        wiener_threshold = integer_root(n, 4)[0] // 3
         vulnerable = d < wiener_threshold
         
         print(f"Wiener threshold: {wiener_threshold:.0f}")
@@ -402,7 +404,6 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         e2 = 3
         
         # Generate random message
-        import random
         m = random.randint(2, n // 100)
         
         print(f"Message: {m}")
@@ -428,8 +429,8 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
             'attack_time_ms': attack_time,
             'conditions': {
                 'same_modulus': True,
-                'gcd_e1_e2': gcd(e1, e2),
-                'coprime_exponents': gcd(e1, e2) == 1
+                'gcd_e1_e2': math.gcd(e1, e2),
+                'coprime_exponents': math.gcd(e1, e2) == 1
             },
             'mitigation': [
                 'Never reuse same modulus n with different exponents',
@@ -440,16 +441,24 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
     
     elif mode == 'broadcast_attack':
         e = params.get('e', 3)
+        if e % 2 == 0:
+            # e chẵn không bao giờ nguyên tố cùng nhau với phi: keygen luôn đổi e
+            raise ValueError(f"e must be odd for broadcast attack, got {e}")
         print(f"Demonstrating broadcast attack with e={e}...")
         
         # Generate e different recipients
+        # keygen tự đổi e khi gcd(e, phi) != 1: sinh lại để mọi recipient đều dùng đúng e
         recipients = []
-        for i in range(e):
+        attempts = 0
+        while len(recipients) < e:
+            if attempts >= BROADCAST_KEYGEN_RETRIES * e:
+                raise RuntimeError(f"Failed to generate {e} keys with e={e} after {attempts} attempts")
+            attempts += 1
             pub, priv = keygen(bits, e)
-            recipients.append({'pub': pub, 'priv': priv})
+            if pub.e == e:
+                recipients.append({'pub': pub, 'priv': priv})
         
         # Generate message (must be small enough)
-        import random
         m = random.randint(2, 10**20)
         
         print(f"Sending message {m} to {e} recipients...")
@@ -495,19 +504,22 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         analysis = []
         
         # Test 1: Wiener vulnerability with different d sizes
+        # Mọi kịch bản cùng bits nên dùng chung một cặp (p, q)
+        p = generate_prime(bits // 2)
+        q = generate_prime(bits // 2)
+        n = p * q
+        phi = (p - 1) * (q - 1)
+        # Ngưỡng Wiener n^(1/4) / 3 tính bằng số nguyên (float tràn với n 2048 bit)
+        wiener_threshold = integer_root(n, 4)[0] // 3
+        
         for d_ratio in [0.1, 0.25, 0.3, 0.35]:
-            from Algorithms.utilities import generate_prime
-            p = generate_prime(bits // 2)
-            q = generate_prime(bits // 2)
-            n = p * q
-            phi = (p - 1) * (q - 1)
-            
-            # Target d size
-            target_d = int(n ** d_ratio)
+            # Target d ~ n^d_ratio (d phải nguyên tố cùng nhau với phi mới có e)
+            target_d = (1 << int(n.bit_length() * d_ratio)) | 1
+            while math.gcd(target_d, phi) != 1:
+                target_d += 2
             e = pow(target_d, -1, phi)
-            d = pow(e, -1, phi)
+            d = target_d  # e^-1 mod phi chính là target_d, không cần nghịch đảo lần nữa
             
-            wiener_threshold = n ** 0.25 / 3
             vulnerable = d < wiener_threshold
             
             analysis.append({
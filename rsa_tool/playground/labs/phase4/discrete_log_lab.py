@@ -13,11 +13,13 @@ Features:
 Related to: Diffie-Hellman, ElGamal, DSA, Elliptic Curve Crypto
 """
 
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Callable
 import sys
 import os
 import random
+import secrets
 import math
+from functools import lru_cache
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')))
@@ -31,7 +33,8 @@ from rsa_tool.playground.playground_utils import (
     add_step,
     create_comparison_table
 )
-from Algorithms.utilities import gcd, is_probable_prime, modexp
+from rsa_tool.playground.labs.phase2.prime_lab import MR_DETERMINISTIC_LIMIT, deterministic_miller_rabin
+from Algorithms.utilities import generate_prime, is_probable_prime, modexp
 
 # ============================================================================
 # LAB METADATA
@@ -99,6 +102,13 @@ PARAMETERS = {
         'max': 256,
         'default': 64,
         'description': 'Bit size for parameter generation'
+    },
+    'algorithm': {
+        'type': str,
+        'required': False,
+        'choices': ['auto', 'bsgs', 'pohlig_hellman'],
+        'default': 'auto',
+        'description': 'DLP solver for solve_dlp (auto: BSGS for p < 10^6, otherwise Pohlig-Hellman)'
     }
 }
 
@@ -131,105 +141,167 @@ EXAMPLES = [
 # DLP ALGORITHMS
 # ============================================================================
 
-def baby_step_giant_step(g: int, h: int, p: int) -> Tuple[Optional[int], Dict[str, int]]:
+# Số giant step gộp vào một khối trong baby_step_giant_step
+BSGS_BLOCK = 256
+
+# BSGS giữ bảng ~sqrt(p) entry: chỉ chạy cho p nhỏ hơn ngưỡng này
+BSGS_MAX_P = 10**6
+
+
+@lru_cache(maxsize=32)
+def _baby_table(g: int, p: int) -> Tuple[Dict[int, int], int]:
     """
-    Baby-step Giant-step algorithm for DLP
+    Bảng baby step {g^j mod p: j} cho j in [0, m), m = ceil(sqrt(p-1))
     
-    Solve: g^x ≡ h (mod p)
-    Complexity: O(sqrt(p)) time and space
+    Cache theo (g, p): chạy lại cùng nhóm với h khác thì bỏ qua cả pha baby step.
+    Mỗi bảng tốn cỡ ~100 byte mỗi phần tử (dict + int), giữ tối đa 32 bảng.
     
-    Returns: (x, operations)
+    Returns: (table, m)
     """
-    ops = {'exponentiations': 0, 'lookups': 0, 'memory_entries': 0}
-    
     # Calculate m = ceil(sqrt(p-1))
     m = math.isqrt(p - 1) + 1
     
-    # Baby step: compute table[g^j mod p] = j for j in [0, m)
-    table = {}
+    # Tính list lũy thừa trước rồi dựng dict một lần bằng dict(zip(...)) (chạy trong C)
+    powers = [1] * m
     power = 1
-    for j in range(m):
-        table[power] = j
-        ops['memory_entries'] += 1
+    for j in range(1, m):
         power = (power * g) % p
-        ops['exponentiations'] += 1
+        if power == 1:
+            # ord(g) = j < m: bảng đã chứa cả nhóm <g>, không cần thêm lũy thừa
+            del powers[j:]
+            break
+        powers[j] = power
+    return dict(zip(powers, range(len(powers)))), m
+
+
+def baby_step_giant_step(g: int, h: int, p: int) -> Tuple[Optional[int], Dict[str, int]]:
+    """
+    Baby-step Giant-step algorithm for DLP
     
-    # Giant step: compute g^(-m) and check h * g^(-im) for i in [0, m)
-    g_inv_m = pow(pow(g, m, p), -1, p)  # g^(-m) mod p
-    ops['exponentiations'] += 1
+    Solve: g^x ≡ h (mod p)
+    Complexity: O(sqrt(p)) time and space
     
-    gamma = h
-    for i in range(m):
-        ops['lookups'] += 1
-        if gamma in table:
-            # Found: h ≡ g^(im + j) where j = table[gamma]
-            x = i * m + table[gamma]
-            return x, ops
-        gamma = (gamma * g_inv_m) % p
-        ops['exponentiations'] += 1
+    Returns: (x, operations)
+    """
+    # Baby step: compute table[g^j mod p] = j for j in [0, m)
+    table, m = _baby_table(g, p)
+    size = len(table)
     
-    return None, ops
-
-
-def pollard_rho_dlp(g: int, h: int, p: int, max_iterations: int = 100000) -> Tuple[Optional[int], Dict[str, int]]:
+    if size < m:
+        # Toàn bộ <g> nằm trong bảng: một lần tra là đủ, không cần giant step
+        return table.get(h % p), {'exponentiations': size, 'lookups': 1, 'memory_entries': size}
+    
+    # Giant step: compute g^(-m) and check h * g^(-im) for i in [0, m)
+    g_inv_m = pow(g, -m, p)  # g^(-m) mod p: pow tự nghịch đảo với số mũ âm, một lần gọi
+    
+    # Giant step theo khối BSGS_BLOCK: tính cả khối gamma bằng list comprehension,
+    # rồi kiểm tra giao với bảng bằng một lần isdisjoint (vòng lặp chạy trong C).
+    # Số lookup/phép nhân suy ra từ chỉ số, không đụng tới dict ops trong vòng lặp.
+    block = min(BSGS_BLOCK, m)
+    steps = [1] * block  # g^(-km) cho k in [0, block)
+    for k in range(1, block):
+        steps[k] = (steps[k - 1] * g_inv_m) % p
+    stride = (steps[-1] * g_inv_m) % p  # g^(-block*m)
+    keys = table.keys()
+    
+    base = h % p
+    for i0 in range(0, m, block):
+        gammas = [(base * step) % p for step in steps[:m - i0]]
+        if not keys.isdisjoint(gammas):
+            for k, gamma in enumerate(gammas):
+                j = table.get(gamma)
+                if j is not None:
+                    # Found: h ≡ g^(im + j) where j = table[gamma]
+                    i = i0 + k
+                    x = i * m + j
+                    return x, {'exponentiations': size + 1 + i, 'lookups': i + 1, 'memory_entries': size}
+        base = (base * stride) % p
+    
+    return None, {'exponentiations': size + 1 + m, 'lookups': m, 'memory_entries': size}
+
+
+def pollard_rho_dlp(g: int, h: int, p: int, max_iterations: int = 100000,
+                    verify: bool = False) -> Tuple[Optional[int], Dict[str, int]]:
     """
     Pollard's Rho algorithm for DLP
     
     Solve: g^x ≡ h (mod p)
     Complexity: O(sqrt(p)) time, O(1) space
     
+    Dùng Brent's cycle detection (mỗi bước chỉ tính f một lần, thay vì 3 lần
+    như Floyd) với hàm phân hoạch f viết inline. Va chạm suy biến thì bắt đầu
+    lại từ y = g^a * h^b ngẫu nhiên.
+    
+    Khi gcd(b_diff, p-1) = 1 nghiệm x là duy nhất và chắc chắn đúng, nên chỉ
+    kiểm tra lại pow(g, x, p) == h nếu verify=True.
+    
     Returns: (x, operations)
     """
-    ops = {'iterations': 0, 'exponentiations': 0}
+    n = p - 1  # Số mũ tính theo mod p-1
     
-    # Partition function
-    def f(y, a, b):
+    # Floyd cũ tính f 3 lần mỗi iteration: giữ nguyên lượng công việc tối đa
+    budget = 3 * max_iterations
+    iterations = 0
+    exponentiations = 0
+    
+    # Hare (y, a, b) với y = g^a * h^b; tortoise (ys, a_s, b_s) đặt lại ở mốc lũy thừa 2
+    y, a, b = 1, 0, 0
+    ys, a_s, b_s = y, a, b
+    power = lam = 1
+    
+    while iterations < budget:
+        iterations += 1
+        
+        # Partition function f, inline
         partition = y % 3
         if partition == 0:
-            return (y * y) % p, (2 * a) % (p - 1), (2 * b) % (p - 1)
+            y = (y * y) % p
+            a = (2 * a) % n
+            b = (2 * b) % n
         elif partition == 1:
-            return (y * g) % p, (a + 1) % (p - 1), b
+            y = (y * g) % p
+            a = (a + 1) % n
         else:
-            return (y * h) % p, a, (b + 1) % (p - 1)
-    
-    # Initialize
-    y1, a1, b1 = 1, 0, 0
-    y2, a2, b2 = 1, 0, 0
-    
-    for _ in range(max_iterations):
-        ops['iterations'] += 1
-        
-        # Tortoise: one step
-        y1, a1, b1 = f(y1, a1, b1)
-        ops['exponentiations'] += 1
-        
-        # Hare: two steps
-        y2, a2, b2 = f(y2, a2, b2)
-        y2, a2, b2 = f(y2, a2, b2)
-        ops['exponentiations'] += 2
+            y = (y * h) % p
+            b = (b + 1) % n
+        exponentiations += 1
         
-        if y1 == y2:
+        if y == ys:
             # Found collision
-            # g^a1 * h^b1 ≡ g^a2 * h^b2 (mod p)
-            # g^(a1-a2) ≡ h^(b2-b1) (mod p)
-            # g^(a1-a2) ≡ g^(x(b2-b1)) (mod p)
-            # x ≡ (a1-a2) / (b2-b1) (mod p-1)
+            # g^a_s * h^b_s ≡ g^a * h^b (mod p)
+            # g^(a_s-a) ≡ h^(b-b_s) ≡ g^(x(b-b_s)) (mod p)
+            # x * (b-b_s) ≡ a_s-a (mod p-1)
+            b_diff = (b - b_s) % n
+            a_diff = (a_s - a) % n
+            d = math.gcd(b_diff, n)
             
-            b_diff = (b2 - b1) % (p - 1)
-            if b_diff == 0:
-                continue
+            if b_diff and a_diff % d == 0 and d <= 1024:
+                # d nghiệm mod p-1, cách nhau n/d
+                step = n // d
+                x = (a_diff // d) * pow(b_diff // d, -1, step) % step
+                if d == 1 and not verify:
+                    return x, {'iterations': iterations, 'exponentiations': exponentiations}
+                for _ in range(d):
+                    exponentiations += 1
+                    if pow(g, x, p) == h:
+                        return x, {'iterations': iterations, 'exponentiations': exponentiations}
+                    x += step
             
-            if gcd(b_diff, p - 1) != 1:
-                continue
-            
-            a_diff = (a1 - a2) % (p - 1)
-            x = (a_diff * pow(b_diff, -1, p - 1)) % (p - 1)
-            
-            # Verify
-            if pow(g, x, p) == h:
-                return x, ops
+            # Va chạm suy biến: bắt đầu lại từ điểm ngẫu nhiên
+            a, b = random.randrange(n), random.randrange(n)
+            y = (pow(g, a, p) * pow(h, b, p)) % p
+            exponentiations += 2
+            ys, a_s, b_s = y, a, b
+            power = lam = 1
+            continue
+        
+        if lam == power:
+            ys, a_s, b_s = y, a, b
+            power *= 2
+            lam = 0
+        lam += 1
     
-    return None, ops
+    return None, {'iterations': iterations, 'exponentiations': exponentiations}
 
 
 def naive_dlp(g: int, h: int, p: int) -> Tuple[Optional[int], Dict[str, int]]:
@@ -238,16 +310,163 @@ def naive_dlp(g: int, h: int, p: int) -> Tuple[Optional[int], Dict[str, int]]:
     
     Returns: (x, operations)
     """
-    ops = {'exponentiations': 0}
-    
+    # Vòng lặp chỉ dùng biến local; số phép nhân suy ra từ x ở cuối
     current = 1
     for x in range(p):
-        ops['exponentiations'] += 1
         if current == h:
-            return x, ops
+            return x, {'exponentiations': x + 1}
         current = (current * g) % p
+        if current == 1:
+            # Đã đi hết chu trình <g> mà không gặp h: h không thuộc <g>
+            return None, {'exponentiations': x + 1}
+    
+    return None, {'exponentiations': p}
+
+
+# Pohlig-Hellman: chia thử p-1 tới ngưỡng này, phần còn lại phải là số nguyên tố
+PH_TRIAL_LIMIT = 1 << 20
+
+# Thừa số nguyên tố lớn nhất của ord(g) mà BSGS con còn chấp nhận (bảng ~10^6 entry)
+PH_MAX_PRIME = 10**12
+
+
+@lru_cache(maxsize=128)
+def _factor_order(n: int) -> Optional[Tuple[Tuple[int, int], ...]]:
+    """
+    Phân tích n = p-1 thành ((q, e), ...), cache theo n
+    
+    Trả về None nếu phần còn lại sau khi chia thử không phải số nguyên tố.
+    """
+    factors = []
+    for q in (2, 3):
+        e = 0
+        while n % q == 0:
+            n //= q
+            e += 1
+        if e:
+            factors.append((q, e))
+    
+    # Các ứng viên 6k ± 1
+    q, step = 5, 2
+    limit = min(PH_TRIAL_LIMIT, math.isqrt(n))
+    while q <= limit:
+        if n % q == 0:
+            e = 0
+            while n % q == 0:
+                n //= q
+                e += 1
+            factors.append((q, e))
+            limit = min(PH_TRIAL_LIMIT, math.isqrt(n))
+        q += step
+        step = 6 - step
+    
+    if n > 1:
+        if not is_probable_prime(n):
+            return None
+        factors.append((n, 1))
+    return tuple(factors)
+
+
+def _find_generator(p: int) -> int:
+    """
+    Tìm generator nhỏ nhất của Z_p^*: g^((p-1)/q) != 1 với mọi thừa số nguyên tố q của p-1
+    
+    Nếu không phân tích được p-1 thì chỉ loại được thặng dư bậc hai (2 hoặc 3 như trước).
+    """
+    factors = _factor_order(p - 1)
+    if factors is None:
+        return 2 if pow(2, (p - 1) // 2, p) != 1 else 3
+    
+    n = p - 1
+    for g in range(2, p):
+        if all(pow(g, n // q, p) != 1 for q, _ in factors):
+            return g
+    return 1  # p = 2: Z_2^* = {1}
+
+
+def _dlp_prime_order(gamma: int, target: int, p: int, q: int) -> Optional[int]:
+    """BSGS trong nhóm con cấp q (gamma có cấp q): tìm d ∈ [0, q) với gamma^d = target"""
+    m = math.isqrt(q) + 1
+    table = {}
+    power = 1
+    for j in range(m):
+        table.setdefault(power, j)
+        power = (power * gamma) % p
     
-    return None, ops
+    step = pow(gamma, -m, p)
+    for i in range(m):
+        j = table.get(target)
+        if j is not None:
+            return (i * m + j) % q
+        target = (target * step) % p
+    return None
+
+
+def pohlig_hellman(g: int, h: int, p: int) -> Tuple[Optional[int], Dict[str, int]]:
+    """
+    Pohlig-Hellman algorithm for DLP
+    
+    Solve: g^x ≡ h (mod p)
+    Complexity: O(sum e_i * (log p + sqrt(q_i))) với ord(g) = prod q_i^e_i
+    
+    Giải DLP trong từng nhóm con cấp q^e (từng chữ số cơ số q bằng BSGS),
+    rồi ghép lại bằng CRT. Hiệu quả khi p-1 chỉ có thừa số nguyên tố nhỏ.
+    
+    Returns: (x, operations)
+    """
+    ops = {'exponentiations': 0, 'subproblems': 0}
+    
+    factors = _factor_order(p - 1)
+    if factors is None:
+        return None, ops
+    
+    # Cấp thật của g (g có thể không phải generator)
+    order = p - 1
+    order_factors = []
+    for q, e in factors:
+        while e and pow(g, order // q, p) == 1:
+            order //= q
+            e -= 1
+            ops['exponentiations'] += 1
+        if e:
+            if q > PH_MAX_PRIME:
+                return None, ops
+            order_factors.append((q, e))
+    
+    # h phải thuộc <g>
+    ops['exponentiations'] += 1
+    if pow(h, order, p) != 1:
+        return None, ops
+    
+    # Giải x mod q^e cho từng thừa số rồi ghép bằng CRT (Garner)
+    x, modulus = 0, 1
+    for q, e in order_factors:
+        q_e = q ** e
+        cofactor = order // q_e
+        g_i = pow(g, cofactor, p)  # cấp q^e
+        h_i = pow(h, cofactor, p)
+        gamma = pow(g_i, q_e // q, p)  # cấp q
+        g_i_inv = pow(g_i, -1, p)
+        ops['exponentiations'] += 4
+        
+        x_i = 0
+        q_k = 1  # q^k
+        for k in range(e):
+            # h_k = (g_i^(-x_i) * h_i)^(q^(e-1-k)) nằm trong <gamma>
+            h_k = pow(pow(g_i_inv, x_i, p) * h_i % p, q_e // (q_k * q), p)
+            d_k = _dlp_prime_order(gamma, h_k, p, q)
+            ops['exponentiations'] += 2
+            ops['subproblems'] += 1
+            if d_k is None:
+                return None, ops
+            x_i += d_k * q_k
+            q_k *= q
+        
+        t = (x_i - x) * pow(modulus, -1, q_e) % q_e
+        x += t * modulus
+        modulus *= q_e
+    
+    return x, ops
 
 
 # ============================================================================
@@ -340,13 +559,63 @@ def elgamal_decrypt(c1: int, c2: int, private_key: Dict, p: int) -> int:
     m = c2 / c1^x = c2 * c1^(-x) mod p
     """
     x = private_key['x']
-    s = pow(c1, x, p)
-    s_inv = pow(s, -1, p)
+    # s^(-1) = c1^(-x) = c1^(p-1-x) mod p (Fermat, p nguyên tố): một lần pow, không cần nghịch đảo
+    s_inv = pow(c1, p - 1 - x, p)
     message = (c2 * s_inv) % p
     
     return message
 
 
+def make_elgamal_encrypt(public_key: Dict) -> Callable[[int], Tuple[int, int]]:
+    """
+    Closure mã hóa ElGamal gắn sẵn (p, g, h)
+    
+    Dùng khi mã hóa nhiều message với cùng một key: tra dict một lần duy nhất.
+    """
+    p, g, h = public_key['p'], public_key['g'], public_key['h']
+    randint = random.randint
+    
+    def encrypt(message: int) -> Tuple[int, int]:
+        y = randint(1, p - 2)
+        return pow(g, y, p), (message * pow(h, y, p)) % p
+    
+    return encrypt
+
+
+def make_elgamal_decrypt(private_key: Dict, p: int) -> Callable[[int, int], int]:
+    """Closure giải mã ElGamal gắn sẵn (x, p), xem elgamal_decrypt"""
+    e = p - 1 - private_key['x']  # c1^(-x) = c1^(p-1-x)
+    
+    def decrypt(c1: int, c2: int) -> int:
+        return (c2 * pow(c1, e, p)) % p
+    
+    return decrypt
+
+
+# ============================================================================
+# PRIME GENERATION
+# ============================================================================
+
+def _gen_prime(bits: int) -> int:
+    """Random prime đúng `bits` bit; p đủ nhỏ thì dùng Miller-Rabin tất định của prime_lab"""
+    if bits >= MR_DETERMINISTIC_LIMIT.bit_length():
+        return generate_prime(bits)
+    if bits < 2:
+        raise ValueError("bits must be >= 2")
+    if bits == 2:
+        return random.choice((2, 3))
+    
+    top = 1 << (bits - 1)
+    while True:
+        p = secrets.randbits(bits) | top | 1
+        if deterministic_miller_rabin(p):
+            return p
+
+
+# security_analysis: số phép toán O(sqrt(2^bits)) cho từng cỡ nhóm, tính sẵn bằng int
+_SECURITY_OPS = {bits: 1 << (bits // 2) for bits in (32, 64, 96, 128, 160)}
+
+
 # ============================================================================
 # MAIN ENTRY POINT
 # ============================================================================
@@ -372,27 +641,37 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         
         print(f"Solving DLP: {g}^x ≡ {h} (mod {p})...")
         
-        # Use baby-step giant-step for small p
-        if p < 10**6:
+        # Use baby-step giant-step for small p, Pohlig-Hellman otherwise
+        algorithm = params.get('algorithm', 'auto')
+        if algorithm == 'auto':
+            algorithm = 'bsgs' if p < BSGS_MAX_P else 'pohlig_hellman'
+        
+        if algorithm == 'bsgs':
+            if p >= BSGS_MAX_P:
+                raise ValueError(f"bsgs only supports p < {BSGS_MAX_P}; use algorithm='pohlig_hellman' for larger p")
             x, time_taken = benchmark(baby_step_giant_step, g, h, p)
-            
-            results = {
-                'p': p,
-                'g': g,
-                'h': h,
-                'x': x[0],
-                'algorithm': 'Baby-step Giant-step',
-                'operations': x[1],
-                'time_ms': time_taken,
-                'verification': pow(g, x[0], p) == h if x[0] else False
-            }
+            algorithm_name = 'Baby-step Giant-step'
+            failure = f"h is not a power of g modulo {p}"
+        elif algorithm == 'pohlig_hellman':
+            x, time_taken = benchmark(pohlig_hellman, g, h, p)
+            algorithm_name = 'Pohlig-Hellman'
+            failure = (f"No solution: p-1 could not be factored, ord(g) has a prime factor > {PH_MAX_PRIME}, "
+                       f"or h is not a power of g modulo {p}")
         else:
-            results = {
-                'p': p,
-                'g': g,
-                'h': h,
-                'error': 'p too large for current algorithms'
-            }
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        
+        results = {
+            'p': p,
+            'g': g,
+            'h': h,
+            'x': x[0],
+            'algorithm': algorithm_name,
+            'operations': x[1],
+            'time_ms': time_taken,
+            'verification': pow(g, x[0], p) == h if x[0] is not None else False
+        }
+        if x[0] is None:
+            results['error'] = failure
     
     elif mode == 'compare_algorithms':
         bits = params.get('bits', 32)
@@ -400,11 +679,10 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         print(f"Generating {bits}-bit DLP problem...")
         
         # Generate prime p
-        from Algorithms.utilities import generate_prime
-        p = generate_prime(bits)
+        p = _gen_prime(bits)
         
-        # Find generator g (simplified: just use 2 or 3)
-        g = 2 if pow(2, (p - 1) // 2, p) != 1 else 3
+        # Find generator g
+        g = _find_generator(p)
         
         # Random exponent
         x_true = random.randint(1, p - 2)
@@ -425,7 +703,7 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
             }
         
         # Baby-step giant-step
-        if p < 10**6:
+        if p < BSGS_MAX_P:
             result_bsgs, time_bsgs = benchmark(baby_step_giant_step, g, h, p)
             comparison['baby_step_giant_step'] = {
                 'x': result_bsgs[0],
@@ -434,8 +712,17 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
                 'success': result_bsgs[0] == x_true
             }
         
+        # Pohlig-Hellman
+        result_ph, time_ph = benchmark(pohlig_hellman, g, h, p)
+        comparison['pohlig_hellman'] = {
+            'x': result_ph[0],
+            'operations': result_ph[1],
+            'time_ms': time_ph,
+            'success': result_ph[0] == x_true
+        }
+        
         # Pollard Rho
-        result_rho, time_rho = benchmark(pollard_rho_dlp, g, h, p, min(100000, p))
+        result_rho, time_rho = benchmark(pollard_rho_dlp, g, h, p, min(100000, p), verify=True)
         comparison['pollard_rho'] = {
             'x': result_rho[0],
             'operations': result_rho[1],
@@ -458,9 +745,8 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         print(f"Simulating Diffie-Hellman with {bits}-bit parameters...")
         
         # Generate parameters
-        from Algorithms.utilities import generate_prime
-        p = generate_prime(bits)
-        g = 2 if pow(2, (p - 1) // 2, p) != 1 else 3
+        p = _gen_prime(bits)
+        g = _find_generator(p)
         
         # Run exchange
         exchange = diffie_hellman_exchange(p, g)
@@ -484,9 +770,8 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
         print(f"Demonstrating ElGamal encryption...")
         
         # Generate parameters
-        from Algorithms.utilities import generate_prime
-        p = generate_prime(bits)
-        g = 2 if pow(2, (p - 1) // 2, p) != 1 else 3
+        p = _gen_prime(bits)
+        g = _find_generator(p)
         
         # Generate keys
         keys = elgamal_keygen(p, g)
@@ -519,17 +804,15 @@ def run(params: Dict[str, Any]) -> Dict[str, Any]:
     elif mode == 'security_analysis':
         # Analyze DLP vs Factorization security
         
-        bit_sizes = [32, 64, 96, 128, 160]
         analysis = []
         
-        for bits in bit_sizes:
-            # Theoretical complexity
-            sqrt_ops = 2 ** (bits / 2)
+        for bits, sqrt_ops in _SECURITY_OPS.items():
+            # Theoretical complexity: sqrt_ops = 2^(bits/2), tra bảng thay vì pow float
             
             analysis.append({
                 'bits': bits,
                 'group_size': f'~2^{bits}',
-                'dlp_complexity': f'O(2^{bits/2}) = O(2^{bits//2})',
+                'dlp_complexity': f'O(2^{bits // 2})',
                 'operations': sqrt_ops,
                 'estimated_time': 'milliseconds' if sqrt_ops < 10**9 else 'seconds' if sqrt_ops < 10**12 else 'infeasible',
                 'comparison': {
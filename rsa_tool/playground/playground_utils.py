@@ -8,15 +8,23 @@ Shared utilities for all playground modules including:
 - Benchmark tools
 """
 
+import csv
+import io
+import itertools
 import json
 import time
+from functools import lru_cache
 from typing import Any, Dict, List, Callable
 from datetime import datetime
 
 
+# Bộ đếm tăng dần: hai run trong cùng một nano giây vẫn có ID khác nhau
+_experiment_counter = itertools.count()
+
+
 def create_experiment_id() -> str:
-    """Generate unique experiment ID with timestamp"""
-    return f"exp_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    """Generate unique experiment ID with timestamp (time_ns, không strftime)"""
+    return f"exp_{time.time_ns()}_{next(_experiment_counter)}"
 
 
 def format_results(
@@ -50,21 +58,25 @@ def format_results(
     }
 
 
-def benchmark(func: Callable, *args, **kwargs) -> tuple[Any, float]:
+def benchmark(func: Callable, *args, repeat: int = 1, **kwargs) -> tuple[Any, float]:
     """
     Benchmark a function execution
     
     Args:
         func: Function to benchmark
         *args, **kwargs: Function arguments
+        repeat: Số lần gọi; time_ms là trung bình mỗi lần (dùng cho hàm dưới ~1 µs,
+            khi một lần đo chỉ còn là nhiễu)
         
     Returns:
         Tuple of (result, time_ms)
     """
-    start_time = time.perf_counter()
+    # perf_counter_ns: hiệu số nguyên, không mất độ chính xác float khi uptime lớn
+    start_ns = time.perf_counter_ns()
     result = func(*args, **kwargs)
-    end_time = time.perf_counter()
-    time_ms = (end_time - start_time) * 1000
+    for _ in range(repeat - 1):
+        func(*args, **kwargs)
+    time_ms = (time.perf_counter_ns() - start_ns) / (1e6 * max(repeat, 1))
     return result, time_ms
 
 
@@ -101,15 +113,15 @@ def export_to_csv(data: List[Dict[str, Any]], columns: List[str] = None) -> str:
     if columns is None:
         columns = list(data[0].keys())
     
-    # Header
-    csv_lines = [','.join(columns)]
-    
-    # Rows
-    for row in data:
-        values = [str(row.get(col, '')) for col in columns]
-        csv_lines.append(','.join(values))
+    # csv.DictWriter (C): quote ô chứa dấu phẩy/xuống dòng/ngoặc kép, cột thiếu -> ''
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, restval='',
+                            extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(data)
     
-    return '\n'.join(csv_lines)
+    # Giữ format cũ: không có dòng trống ở cuối
+    return buffer.getvalue()[:-1]
 
 
 def format_number(n: int, notation: str = 'default') -> str:
@@ -138,6 +150,34 @@ def format_number(n: int, notation: str = 'default') -> str:
         return str(n)
 
 
+@lru_cache(maxsize=256)
+def cached_modinv(a: int, m: int) -> int:
+    """
+    Modular inverse a^(-1) mod m, cached theo (a, m)
+    
+    Chạy lại lab với cùng bộ moduli (CRT) thì không phải nghịch đảo lại.
+    Raises ValueError nếu gcd(a, m) != 1.
+    """
+    return pow(a, -1, m)
+
+
+def compile_schema(schema: Dict[str, Dict]) -> List[tuple]:
+    """
+    Rút schema thành list (name, required, type, min, max) để validate không phải dict.get
+    
+    None nghĩa là không có ràng buộc tương ứng.
+    """
+    return [
+        (name, rules.get('required', False), rules.get('type'), rules.get('min'), rules.get('max'))
+        for name, rules in schema.items()
+    ]
+
+
+# id(schema) -> (schema, compiled); giữ tham chiếu tới schema để id không bị tái sử dụng.
+# PARAMETERS của các lab là hằng module, nên compile một lần là đủ.
+_compiled_schemas: Dict[int, tuple] = {}
+
+
 def validate_parameters(params: Dict[str, Any], schema: Dict[str, Dict]) -> List[str]:
     """
     Validate parameters against schema
@@ -149,30 +189,31 @@ def validate_parameters(params: Dict[str, Any], schema: Dict[str, Dict]) -> List
     Returns:
         List of error messages (empty if valid)
     """
+    entry = _compiled_schemas.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        entry = _compiled_schemas[id(schema)] = (schema, compile_schema(schema))
+    
     errors = []
     
-    for param_name, rules in schema.items():
-        # Check required
-        if rules.get('required', False) and param_name not in params:
-            errors.append(f"Missing required parameter: {param_name}")
-            continue
-        
+    for param_name, required, expected_type, min_val, max_val in entry[1]:
         if param_name not in params:
+            # Check required
+            if required:
+                errors.append(f"Missing required parameter: {param_name}")
             continue
         
         value = params[param_name]
         
         # Check type
-        expected_type = rules.get('type')
         if expected_type and not isinstance(value, expected_type):
             errors.append(f"Parameter '{param_name}' must be {expected_type.__name__}")
         
         # Check range for numbers
         if isinstance(value, (int, float)):
-            if 'min' in rules and value < rules['min']:
-                errors.append(f"Parameter '{param_name}' must be >= {rules['min']}")
-            if 'max' in rules and value > rules['max']:
-                errors.append(f"Parameter '{param_name}' must be <= {rules['max']}")
+            if min_val is not None and value < min_val:
+                errors.append(f"Parameter '{param_name}' must be >= {min_val}")
+            if max_val is not None and value > max_val:
+                errors.append(f"Parameter '{param_name}' must be <= {max_val}")
     
     return errors
 
@@ -5,12 +5,90 @@ Xử lý các thao tác RSA operations
 import sys
 import os
 
-# Add parent directory to import Algorithms
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# Add parent directory to import Algorithms (chỉ thêm một lần, tránh phình sys.path khi reload)
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _ROOT_DIR not in sys.path:
+    sys.path.insert(0, _ROOT_DIR)
 
 from Algorithms.rsa import keygen, RSA, PublicKey, PrivateKey
-from Algorithms.utilities import modinv
 import time
+from functools import lru_cache
+
+
+# Cache key/RSA objects theo tham số khóa (int hashable): các API call lặp lại với
+# cùng một key không dựng lại object và không tính lại tham số CRT.
+KEY_CACHE_SIZE = 32
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _get_priv_crt(d, n, p, q):
+    """PrivateKey kèm dp, dq, qinv tính sẵn"""
+    return PrivateKey(d=d, n=n, p=p, q=q, dp=d % (p - 1), dq=d % (q - 1), qinv=pow(q, -1, p))
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _get_rsa_pub(e, n):
+    """RSA chỉ có public key (encrypt / verify)"""
+    return RSA(pub=PublicKey(e=e, n=n), priv=None)
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _get_rsa_priv(d, n, p=None, q=None):
+    """RSA có private key; có p, q thì private key mang sẵn tham số CRT"""
+    priv = _get_priv_crt(d, n, p, q) if p and q else PrivateKey(d=d, n=n)
+    return RSA(pub=PublicKey(e=65537, n=n), priv=priv)
+
+
+def _as_bytes(message):
+    """str -> UTF-8 bytes; bytes/bytearray/memoryview dùng nguyên (đã encode sẵn ở phía gọi)"""
+    if isinstance(message, (bytes, bytearray, memoryview)):
+        return message
+    return message.encode('utf-8')
+
+
+# Thông tin mode/security trả về kèm kết quả *_with_padding: cố định theo mode,
+# dựng một lần ở module thay vì mỗi request
+_OAEP_ENC_INFO = {
+    'mode': 'OAEP (RFC 8017)',
+    'security_level': 'High - Non-deterministic, IND-CCA2',
+    'padding_scheme': 'PKCS#1 v2.1'
+}
+_TEXTBOOK_ENC_INFO = {
+    'mode': 'Textbook RSA',
+    'security_level': 'Low - Deterministic, malleable (educational only)',
+    'padding_scheme': 'None'
+}
+_OAEP_DEC_INFO = {
+    'mode': 'OAEP (RFC 8017)',
+    'security_level': 'High - Protected against padding oracle attacks',
+    'padding_scheme': 'PKCS#1 v2.1'
+}
+_TEXTBOOK_DEC_INFO = {
+    'mode': 'Textbook RSA',
+    'security_level': 'Low - Vulnerable to chosen ciphertext attacks',
+    'padding_scheme': 'None'
+}
+_PSS_SIGN_INFO = {
+    'mode': 'PSS (RFC 8017)',
+    'security_level': 'High - Probabilistic, provably secure',
+    'padding_scheme': 'PKCS#1 v2.1'
+}
+_TEXTBOOK_SIGN_INFO = {
+    'mode': 'Textbook RSA Signature',
+    'security_level': 'Low - Vulnerable to forgery attacks',
+    'padding_scheme': 'None'
+}
+_PSS_VERIFY_INFO = {
+    'mode': 'PSS (RFC 8017)',
+    'security_level': 'High - Provably secure verification',
+    'padding_scheme': 'PKCS#1 v2.1'
+}
+_TEXTBOOK_VERIFY_INFO = {
+    'mode': 'Textbook RSA Verification',
+    'security_level': 'Low - Susceptible to signature forgery',
+    'padding_scheme': 'None'
+}
+
 
 class RSAService:
     """
@@ -62,12 +140,11 @@ class RSAService:
         Returns:
             dict: {'ciphertext': [...], 'num_blocks': int, ...}
         """
-        pub = PublicKey(e=e, n=n)
-        rsa = RSA(pub=pub, priv=None)
+        rsa = _get_rsa_pub(e, n)
         ciphertext_blocks = rsa.encrypt_text(message)
         
         return {
-            'ciphertext': [str(c) for c in ciphertext_blocks],
+            'ciphertext': list(map(str, ciphertext_blocks)),
             'num_blocks': len(ciphertext_blocks),
             'original_length': len(message)
         }
@@ -82,53 +159,47 @@ class RSAService:
             d: Private exponent
             n: Modulus
             p, q: Primes (optional, for CRT)
-            use_crt: Có dùng CRT optimization không
+            use_crt: Giữ cho tương thích API; có p, q là luôn dùng CRT
             
         Returns:
             dict: {'plaintext': str, 'use_crt': bool, 'time_ms': float}
         """
-        pub = PublicKey(e=65537, n=n)
-        
-        # Tạo private key (có hoặc không CRT)
-        if p and q and use_crt:
-            dp = d % (p - 1)
-            dq = d % (q - 1)
-            qinv = modinv(q, p)
-            priv = PrivateKey(d=d, n=n, p=p, q=q, dp=dp, dq=dq, qinv=qinv)
-        else:
-            priv = PrivateKey(d=d, n=n)
-        
-        rsa = RSA(pub=pub, priv=priv)
+        # Tạo RSA với private key (có hoặc không CRT), cache theo key.
+        # CRT nhanh hơn ~3-4x nên luôn dùng khi biết p, q
+        crt = bool(p and q)
+        rsa = _get_rsa_priv(d, n, p, q) if crt else _get_rsa_priv(d, n)
         
         # Đo thời gian nếu dùng CRT
-        start = time.perf_counter()
-        plaintext = rsa.decrypt_text(ciphertext)
-        elapsed = time.perf_counter() - start
+        start = time.perf_counter_ns()
+        # pow built-in (C) đã là modexp nhanh nhất sẵn có; phần lợi còn lại là CRT:
+        # hai lũy thừa nửa kích thước thay vì một lũy thừa mod n
+        plaintext = rsa.decrypt_text(ciphertext, use_crt=crt)
+        elapsed_ns = time.perf_counter_ns() - start
         
         return {
             'plaintext': plaintext,
-            'use_crt': use_crt,
-            'time_ms': elapsed * 1000 if use_crt else None
+            'use_crt': crt,
+            'time_ms': elapsed_ns / 1_000_000 if crt else None
         }
     
     @staticmethod
-    def sign(message, d, n):
+    def sign(message, d, n, p=None, q=None):
         """
         Ký số message bằng private key
         
         Args:
-            message: Text cần ký
+            message: Text cần ký (str, hoặc bytes đã encode sẵn)
             d: Private exponent
             n: Modulus
+            p, q: Prime factors (optional, có thì ký bằng CRT)
             
         Returns:
             int: Signature
         """
-        pub = PublicKey(e=65537, n=n)
-        priv = PrivateKey(d=d, n=n)
-        rsa = RSA(pub=pub, priv=priv)
+        crt = bool(p and q)
+        rsa = _get_rsa_priv(d, n, p, q) if crt else _get_rsa_priv(d, n)
         
-        return rsa.sign(message.encode('utf-8'))
+        return rsa.sign(_as_bytes(message), use_crt=crt)
     
     @staticmethod
     def verify(message, signature, e, n):
@@ -136,7 +207,7 @@ class RSAService:
         Xác minh chữ ký
         
         Args:
-            message: Text gốc
+            message: Text gốc (str, hoặc bytes đã encode sẵn)
             signature: Chữ ký cần verify
             e: Public exponent
             n: Modulus
@@ -144,10 +215,9 @@ class RSAService:
         Returns:
             bool: True nếu hợp lệ
         """
-        pub = PublicKey(e=e, n=n)
-        rsa = RSA(pub=pub, priv=None)
+        rsa = _get_rsa_pub(e, n)
         
-        return rsa.verify(message.encode('utf-8'), signature)
+        return rsa.verify(_as_bytes(message), signature)
     
     # ---- Methods with padding support ----
     @staticmethod
@@ -156,7 +226,7 @@ class RSAService:
         Mã hóa message với lựa chọn padding mode
         
         Args:
-            message: Text cần mã hóa
+            message: Text cần mã hóa (OAEP nhận cả bytes đã encode sẵn)
             e: Public exponent
             n: Modulus
             padding_mode: 'textbook' hoặc 'oaep'
@@ -164,27 +234,18 @@ class RSAService:
         Returns:
             dict: {'ciphertext': ..., 'mode': ..., 'security_level': ...}
         """
-        pub = PublicKey(e=e, n=n)
-        rsa = RSA(pub=pub, priv=None)
+        rsa = _get_rsa_pub(e, n)
         
         if padding_mode == 'oaep':
-            ciphertext = rsa.encrypt_oaep(message.encode('utf-8'))
-            security_info = {
-                'mode': 'OAEP (RFC 8017)',
-                'security_level': 'High - Non-deterministic, IND-CCA2',
-                'padding_scheme': 'PKCS#1 v2.1'
-            }
+            ciphertext = rsa.encrypt_oaep(_as_bytes(message))
+            security_info = _OAEP_ENC_INFO
             # Convert to string to avoid JavaScript precision loss
             ciphertext = str(ciphertext)
         else:  # textbook
             ciphertext = rsa.encrypt_text(message)
-            security_info = {
-                'mode': 'Textbook RSA',
-                'security_level': 'Low - Deterministic, malleable (educational only)',
-                'padding_scheme': 'None'
-            }
+            security_info = _TEXTBOOK_ENC_INFO
             # Convert list of ints to list of strings
-            ciphertext = [str(c) for c in ciphertext]
+            ciphertext = list(map(str, ciphertext))
         
         return {
             'ciphertext': ciphertext,
@@ -202,29 +263,20 @@ class RSAService:
             n: Modulus
             padding_mode: 'textbook' hoặc 'oaep'
             p, q: Prime factors (cho CRT)
-            use_crt: Có dùng CRT không
+            use_crt: Giữ cho tương thích API; có p, q là luôn dùng CRT
             
         Returns:
             dict: {'plaintext': ..., 'mode': ..., 'security_level': ...}
         """
-        pub = PublicKey(e=65537, n=n)
-        priv = PrivateKey(d=d, n=n, p=p, q=q)
-        rsa = RSA(pub=pub, priv=priv)
+        crt = bool(p and q)
+        rsa = _get_rsa_priv(d, n, p, q) if crt else _get_rsa_priv(d, n)
         
         if padding_mode == 'oaep':
-            plaintext = rsa.decrypt_oaep(ciphertext, use_crt=use_crt).decode('utf-8')
-            security_info = {
-                'mode': 'OAEP (RFC 8017)',
-                'security_level': 'High - Protected against padding oracle attacks',
-                'padding_scheme': 'PKCS#1 v2.1'
-            }
+            plaintext = rsa.decrypt_oaep(ciphertext, use_crt=crt).decode('utf-8')
+            security_info = _OAEP_DEC_INFO
         else:  # textbook
-            plaintext = rsa.decrypt_text([ciphertext] if isinstance(ciphertext, int) else ciphertext, use_crt=use_crt)
-            security_info = {
-                'mode': 'Textbook RSA',
-                'security_level': 'Low - Vulnerable to chosen ciphertext attacks',
-                'padding_scheme': 'None'
-            }
+            plaintext = rsa.decrypt_text([ciphertext] if isinstance(ciphertext, int) else ciphertext, use_crt=crt)
+            security_info = _TEXTBOOK_DEC_INFO
         
         return {
             'plaintext': plaintext,
@@ -232,37 +284,29 @@ class RSAService:
         }
     
     @staticmethod
-    def sign_with_padding(message, d, n, padding_mode='textbook'):
+    def sign_with_padding(message, d, n, padding_mode='textbook', p=None, q=None):
         """
         Ký số message với lựa chọn padding mode
         
         Args:
-            message: Text cần ký
+            message: Text cần ký (str, hoặc bytes đã encode sẵn)
             d: Private exponent
             n: Modulus
             padding_mode: 'textbook' hoặc 'pss'
+            p, q: Prime factors (optional, có thì ký bằng CRT)
             
         Returns:
             dict: {'signature': ..., 'mode': ..., 'security_level': ...}
         """
-        pub = PublicKey(e=65537, n=n)
-        priv = PrivateKey(d=d, n=n)
-        rsa = RSA(pub=pub, priv=priv)
+        crt = bool(p and q)
+        rsa = _get_rsa_priv(d, n, p, q) if crt else _get_rsa_priv(d, n)
         
         if padding_mode == 'pss':
-            signature = rsa.sign_pss(message.encode('utf-8'))
-            security_info = {
-                'mode': 'PSS (RFC 8017)',
-                'security_level': 'High - Probabilistic, provably secure',
-                'padding_scheme': 'PKCS#1 v2.1'
-            }
+            signature = rsa.sign_pss(_as_bytes(message), use_crt=crt)
+            security_info = _PSS_SIGN_INFO
         else:  # textbook
-            signature = rsa.sign(message.encode('utf-8'))
-            security_info = {
-                'mode': 'Textbook RSA Signature',
-                'security_level': 'Low - Vulnerable to forgery attacks',
-                'padding_scheme': 'None'
-            }
+            signature = rsa.sign(_as_bytes(message), use_crt=crt)
+            security_info = _TEXTBOOK_SIGN_INFO
         
         return {
             'signature': str(signature),  # Convert to string for JavaScript
@@ -275,7 +319,7 @@ class RSAService:
         Xác minh chữ ký với lựa chọn padding mode
         
         Args:
-            message: Text gốc
+            message: Text gốc (str, hoặc bytes đã encode sẵn)
             signature: Chữ ký cần verify
             e: Public exponent
             n: Modulus
@@ -284,23 +328,14 @@ class RSAService:
         Returns:
             dict: {'valid': ..., 'mode': ..., 'security_level': ...}
         """
-        pub = PublicKey(e=e, n=n)
-        rsa = RSA(pub=pub, priv=None)
+        rsa = _get_rsa_pub(e, n)
         
         if padding_mode == 'pss':
-            valid = rsa.verify_pss(message.encode('utf-8'), signature)
-            security_info = {
-                'mode': 'PSS (RFC 8017)',
-                'security_level': 'High - Provably secure verification',
-                'padding_scheme': 'PKCS#1 v2.1'
-            }
+            valid = rsa.verify_pss(_as_bytes(message), signature)
+            security_info = _PSS_VERIFY_INFO
         else:  # textbook
-            valid = rsa.verify(message.encode('utf-8'), signature)
-            security_info = {
-                'mode': 'Textbook RSA Verification',
-                'security_level': 'Low - Susceptible to signature forgery',
-                'padding_scheme': 'None'
-            }
+            valid = rsa.verify(_as_bytes(message), signature)
+            security_info = _TEXTBOOK_VERIFY_INFO
         
         return {
             'valid': valid,